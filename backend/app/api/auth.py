@@ -1,11 +1,16 @@
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from app.dbmodels import User
-from sqlalchemy.orm import Session
+from app import metrics
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from sqlalchemy import Select
 from fastapi import Depends, HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import os
 
 
 
@@ -16,12 +21,57 @@ SECRET_KEY = "7f3c9e6b8a4d1f57e2b8c6d3a9e4f781c2d5b6a7f8e9c0d1b2a3c4d5e6f7g8h9"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 600
 
-def authenticate_user(username: str, password: str, db: Session):
+# bcrypt is slow on purpose, so it runs on its own small pool instead of the
+# event loop. bcrypt releases the GIL, so the threads really run in parallel.
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "4"))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "32"))
+
+# Started on first use and shut down by the app's lifespan
+_password_executor: Optional[ThreadPoolExecutor] = None
+password_jobs_pending = 0
+password_jobs_rejected = 0
+
+def get_password_executor():
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt")
+    return _password_executor
+
+def shutdown_password_executor():
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+async def run_password_job(func, *args):
+    global password_jobs_pending, password_jobs_rejected
+    # Reject straight away when the queue is full, a login storm should get
+    # fast 503s instead of piling up behind the pool.
+    if password_jobs_pending >= PASSWORD_QUEUE_LIMIT:
+        password_jobs_rejected += 1
+        metrics.password_jobs_rejected.inc()
+        raise HTTPException(status_code=503, detail="Server is busy, try again later", headers={"Retry-After": "1"})
+    password_jobs_pending += 1
+    metrics.password_jobs_pending.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        password_jobs_pending -= 1
+        metrics.password_jobs_pending.dec()
+
+async def hash_password(password: str):
+    return await run_password_job(pwd_context.hash, password)
+
+async def verify_password(password: str, hashed_password: str):
+    return await run_password_job(pwd_context.verify, password, hashed_password)
+
+async def authenticate_user(username: str, password: str, db: AsyncSession):
     stmt = Select(User).where(User.username == username)
-    user = db.execute(stmt).scalar_one_or_none()
+    user = (await db.execute(stmt)).scalar_one_or_none()
     if not user:
         return False
-    if not pwd_context.verify(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
 
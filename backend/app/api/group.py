@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, File, UploadFile, Form
+from fastapi import APIRouter, Depends, File, UploadFile, Form, Query, Request
 from app.db import db_dependency
-from app.dbmodels import Group, GroupMember
+from app.dbmodels import Group, GroupMember, User
 from datetime import datetime, timezone
-from app.api.auth import pwd_context
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import Optional
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete, func, text
+from typing import Optional, List
 import app.api.auth as auth
-import base64
+from app.images import ingest_image, AVATAR_VARIANTS
+from app.storage import media_url
+from app.search import match_query, groups_fts
+from app.timeline import backfill_timeline, backfill_timelines, drop_membership_entries, drop_members_entries, drop_group_entries
+from app.membership import user_memberships, group_role, invalidate_membership, group_member_ids
 from pydantic import BaseModel
+from app.schemas import GroupOut, GroupMatch, MyGroupOut, GroupMemberOut, respond
+from app.conditional import make_etag, not_modified, with_etag, members_version
+from app.response_cache import group_response_cache, invalidate_group_responses, serve_cached
 from app.api.user import get_user, HTTPError
 
 
@@ -17,62 +24,70 @@ router = APIRouter(
     tags=['Groups']
 )
 
+GROUP_ROLES = ("admin", "user")
+BULK_MEMBERS_MAX = 5000
+
 class AddGroupBM(BaseModel):
     name: str
     description: str
     public: bool
 
-def get_group(db: Session, id: int = None, name: str = None):
+class MemberRoleBM(BaseModel):
+    user_id: int
+    role: str = "user"
+
+class BulkMembersBM(BaseModel):
+    add: List[MemberRoleBM] = []
+    remove: List[int] = []
+    roles: List[MemberRoleBM] = []
+
+async def get_group(db: AsyncSession, id: int = None, name: str = None):
     filters = []
     if id:
         filters.append(Group.id == id)
     if name:
         filters.append(Group.name == name)
     stmt = select(Group).where(*filters)
-    return db.execute(stmt).scalar_one_or_none()
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+async def search_groups(db: AsyncSession, name: str, user_id: int, limit: int = 20, offset: int = 0):
+    query = match_query(name)
+    if not query:
+        return []
+    stmt = (
+        select(Group)
+        .join(groups_fts, groups_fts.c.rowid == Group.id)
+        .where(text("groups_fts MATCH :query").bindparams(query=query))
+        # name matches count for more than description matches
+        .order_by(text("bm25(groups_fts, 10.0, 1.0)"), Group.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    groups = (await db.execute(stmt)).scalars().all()
 
-def search_groups(db: Session, name: str, user_id: int):
-    stmt = select(Group).where(Group.name.ilike(f"%{name}%"))
-    groups = db.execute(stmt).scalars().all()
-    
-    result = []
-    for group in groups:
-        group_dict = group.__dict__.copy()
-        # Check if user is a member
-        member = db.execute(
-            select(GroupMember)
-            .where(GroupMember.group_id == group.id)
-            .where(GroupMember.user_id == user_id)
-        ).scalar_one_or_none()
-        
-        group_dict["is_member"] = member is not None
-        if member:
-            group_dict["role"] = member.role
-        result.append(group_dict)
-    
-    return result
+    roles = await user_memberships(db, user_id)
 
-def is_group_admin(db: Session, user_id: int, group_id: int) -> bool:
-    stmt = select(GroupMember).where(
-        GroupMember.user_id == user_id,
-        GroupMember.group_id == group_id,
-        GroupMember.role == "admin"
-    )
-    return db.execute(stmt).scalar_one_or_none() is not None
-
-def base64_encode(img_bytes: bytes):
-    if img_bytes is None:
-        return None
-    base64_str = base64.b64encode(img_bytes).decode("utf-8")
-    return f"data:image/png;base64,{base64_str}"
-
-def is_user_in_group(db: Session, user_id: int, group_id: int):
-    stmt = select(GroupMember).where(
-        GroupMember.user_id == user_id,
-        GroupMember.group_id == group_id
+    return [
+        serialize_group(group, GroupMatch, is_member=group.id in roles, role=roles.get(group.id))
+        for group in groups
+    ]
+
+async def is_group_admin(db: AsyncSession, user_id: int, group_id: int) -> bool:
+    return await group_role(db, user_id, group_id) == "admin"
+
+def serialize_group(group: Group, schema=GroupOut, **extra):
+    return schema(
+        id=group.id,
+        name=group.name,
+        description=group.description,
+        creation_date=group.creation_date,
+        public=group.public,
+        avatar=media_url(group.avatar_hash, "avatar_96"),
+        **extra
     )
-    result = db.execute(stmt).scalar_one_or_none()
-    return result
+
+async def is_user_in_group(db: AsyncSession, user_id: int, group_id: int) -> bool:
+    return await group_role(db, user_id, group_id) is not None
 
 
 @router.post("/")
@@ -84,10 +99,10 @@ async def add_group(
     avatar: Optional[UploadFile] = File(None),
     current_user: dict = Depends(auth.verify_token)
 ):
-    user = get_user(db=db,id=current_user.get("id"))
+    user = await get_user(db=db,id=current_user.get("id"))
     if not user:
         raise HTTPError(404, "User does not exist")
-    group = get_group(db=db, name=name)
+    group = await get_group(db=db, name=name)
     if group:
         raise HTTPError(400, "Group already exist")
     db_group = Group(
@@ -98,18 +113,20 @@ async def add_group(
     )
     if avatar:
         avatar_bytes = await avatar.read()
-        db_group.avatar = avatar_bytes
+        db_group.avatar_hash = await ingest_image(db, avatar_bytes, AVATAR_VARIANTS)
 
     db.add(db_group)
-    db.commit()
-    db.refresh(db_group)
+    await db.commit()
+    await db.refresh(db_group)
     group_member = GroupMember(
         user_id = user.id,
         group_id = db_group.id,
         role = "admin"
     )
     db.add(group_member)
-    db.commit()
+    await db.commit()
+    await invalidate_membership(user.id)
+    await invalidate_group_responses()
     return {"status": "Success", "result": db_group.id}
 
 
@@ -122,15 +139,15 @@ async def join_group(
 ):
     if current_user.get("role") != "admin" and current_user.get("id") != user_id:
         raise HTTPError(403, "Insufficient permissions")
-    group = get_group(db=db, id=group_id)
+    group = await get_group(db=db, id=group_id)
     if not group:
         raise HTTPError(404, "Group not found")
-    user = get_user(db, id=user_id)
+    user = await get_user(db, id=user_id)
     if not user:
         raise HTTPError(404, "User not found")
 
     # Check if user is already a member
-    existing_member = is_user_in_group(db, user_id, group_id)
+    existing_member = await is_user_in_group(db, user_id, group_id)
     if existing_member:
         return {"status": "Success", "result": "Already a member"}
 
@@ -140,8 +157,10 @@ async def join_group(
         role = "user"
     )
     db.add(group_member)
-    db.commit()
-    db.refresh(group_member)
+    await backfill_timeline(db, user.id, group.id)
+    await db.commit()
+    await db.refresh(group_member)
+    await invalidate_membership(user.id)
 
     return {"status": "Success", "result": f"{group_member.group_id} - {group_member.user_id}"}
 
@@ -150,23 +169,21 @@ async def join_group(
 @router.get("/all")
 async def get_all_groups(
     db: db_dependency,
+    request: Request,
     limit: Optional[int] = 500,
     offset: Optional[int] = 0,
     current_user: dict = Depends(auth.verify_token)
 ):
-    stmt = select(Group).offset(offset).limit(limit)
-    groups_result = db.execute(stmt).scalars().all()
+    async def build():
+        stmt = select(Group).offset(offset).limit(limit)
+        groups_result = (await db.execute(stmt)).scalars().all()
 
-    if not groups_result:
-        raise HTTPError(404, "Group not found")
+        if not groups_result:
+            raise HTTPError(404, "Group not found")
 
-    groups_list = []
-    for group in groups_result:
-        group_dict = group.__dict__.copy()
-        group_dict["avatar"] = base64_encode(group.avatar)
-        groups_list.append(group_dict)
+        return respond([serialize_group(group) for group in groups_result])
 
-    return groups_list
+    return await serve_cached(request, group_response_cache, ("all", limit, offset), build)
 
 
 
@@ -175,21 +192,27 @@ async def get_current_user_groups(
     db: db_dependency,
     current_user: dict = Depends(auth.verify_token)
 ):
-    user = get_user(db, id=current_user.get("id"))
+    user = await get_user(db, id=current_user.get("id"))
     if not user:
         HTTPError(404, "User not found")
 
+    memberships = (await db.scalars(
+        select(GroupMember)
+        .where(GroupMember.user_id == user.id)
+        .options(selectinload(GroupMember.group))
+    )).all()
+
     groups = [
-        {
-            "id": membership.group.id,
-            "name": membership.group.name,
-            "description": membership.group.description,
-            "avatar": base64_encode(membership.group.avatar),
-            "role": membership.role
-        }
-        for membership in user.group_associations
+        MyGroupOut(
+            id=membership.group.id,
+            name=membership.group.name,
+            description=membership.group.description,
+            avatar=media_url(membership.group.avatar_hash, "avatar_96"),
+            role=membership.role
+        )
+        for membership in memberships
     ]
-    return groups
+    return respond(groups)
 
 
 
@@ -198,35 +221,33 @@ async def get_current_user_groups(
 async def get_groups(
     db: db_dependency,
     name: str,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
     current_user: dict = Depends(auth.verify_token)
 ):
-    groups_result = search_groups(db, name, current_user.get("id"))
+    groups_result = await search_groups(db, name, current_user.get("id"), limit, offset)
 
     if not groups_result:
         raise HTTPError(404, "Group not found")
     
-    groups_list = []
-    for group in groups_result:
-        if group.get("avatar"):
-            avatar_base64 = base64.b64encode(group["avatar"]).decode("utf-8")
-            group["avatar"] = f"data:image/png;base64,{avatar_base64}"
-        
-        groups_list.append(group)
-    return groups_list
+    return respond(groups_result)
 
 
 @router.get("/{group_id}")
 async def get_group_by_id(
     db: db_dependency,
     group_id: int,
+    request: Request,
     current_user: dict = Depends(auth.verify_token)
 ):
-    group = get_group(db=db, id=group_id)
-    if not group:
-        raise HTTPError(404, "Group not found")
-    group_dict = group.__dict__.copy()
-    group_dict["avatar"] = base64_encode(group.avatar)
-    return group_dict
+    async def build():
+        group = await get_group(db=db, id=group_id)
+        if not group:
+            raise HTTPError(404, "Group not found")
+        etag = make_etag("group", group.id, group.updated_at, group.avatar_hash)
+        return with_etag(respond(serialize_group(group)), etag)
+
+    return await serve_cached(request, group_response_cache, ("id", group_id), build)
 
 
 @router.put("/{group_id}")
@@ -239,12 +260,12 @@ async def update_group(
     avatar: Optional[UploadFile] = File(None),
     current_user: dict = Depends(auth.verify_token)
 ):
-    group = get_group(db, group_id)
+    group = await get_group(db, group_id)
     if not group:
         raise HTTPError(404, "Group not found")
     
     if name:
-        group_exist = get_group(db=db,name=name)
+        group_exist = await get_group(db=db,name=name)
         if group_exist:
             raise HTTPError(400, "Group already exist")
         group.name = name
@@ -254,10 +275,11 @@ async def update_group(
         group.public = public
     if avatar:
         avatar_bytes = await avatar.read()
-        group.avatar = avatar_bytes
+        group.avatar_hash = await ingest_image(db, avatar_bytes, AVATAR_VARIANTS)
 
-    db.commit()
-    db.refresh(group)
+    await db.commit()
+    await db.refresh(group)
+    await invalidate_group_responses()
 
     return {"status": "Success", "result": group.id}
 
@@ -268,17 +290,22 @@ async def delete_group(
     group_id: int,
     current_user: dict = Depends(auth.verify_token)
 ):
-    user = get_user(db=db, id= current_user.get("id"))
+    user = await get_user(db=db, id= current_user.get("id"))
     if not user:
         raise HTTPError(404, "User not found")
-    group = get_group(db=db, id=group_id)
+    group = await get_group(db=db, id=group_id)
     if not group:
         raise HTTPError(404, "Group not found")
-    if not is_group_admin(db, user.id, group.id):
+    if not await is_group_admin(db, user.id, group.id):
         raise HTTPError(403, "Insufficient permissions")
     
-    db.delete(group)
-    db.commit()
+    member_ids = await group_member_ids(db, group_id)
+    await drop_group_entries(db, group_id)
+    await db.delete(group)
+    await db.commit()
+    for member_id in member_ids:
+        await invalidate_membership(member_id)
+    await invalidate_group_responses()
 
     return {"status": "Success", "result": "Deleted"}
 
@@ -290,10 +317,10 @@ async def add_current_user_to_group(
     group_id: int,
     current_user: dict = Depends(auth.verify_token)
 ):
-    group = get_group(db=db, id=group_id)
+    group = await get_group(db=db, id=group_id)
     if not group:
         raise HTTPError(404, "Group not found")
-    user = get_user(db, id=current_user.get("id"))
+    user = await get_user(db, id=current_user.get("id"))
     if not user:
         raise HTTPError(404, "User not found")
 
@@ -303,8 +330,10 @@ async def add_current_user_to_group(
         role = "user"
     )
     db.add(group_member)
-    db.commit()
-    db.refresh(group_member)
+    await backfill_timeline(db, user.id, group.id)
+    await db.commit()
+    await db.refresh(group_member)
+    await invalidate_membership(user.id)
 
     return {"status": "Success", "result": "Joined"}
 
@@ -315,18 +344,23 @@ async def add_current_user_to_group(
     group_id: int,
     current_user: dict = Depends(auth.verify_token)
 ):
-    group = get_group(db=db, id=group_id)
+    group = await get_group(db=db, id=group_id)
     if not group:
         raise HTTPError(404, "Group not found")
-    user = get_user(db, id=current_user.get("id"))
+    user = await get_user(db, id=current_user.get("id"))
     if not user:
         raise HTTPError(404, "User not found")
-    group_member = is_user_in_group(db,user.id,group_id)
-    if not group_member:
+    if not await is_user_in_group(db, user.id, group_id):
         raise HTTPError(404, "User does not belong to the group")
     
-    db.delete(group_member)
-    db.commit()
+    await db.execute(
+        delete(GroupMember)
+        .where(GroupMember.group_id == group_id)
+        .where(GroupMember.user_id == user.id)
+    )
+    await drop_membership_entries(db, user.id, group_id)
+    await db.commit()
+    await invalidate_membership(user.id)
 
     return {"status": "Success", "result": "Removed"}
 
@@ -336,39 +370,53 @@ async def add_current_user_to_group(
 async def users_in_group(
     db: db_dependency,
     group_id: int,
+    request: Request,
     current_user: dict = Depends(auth.verify_token)
 ):
-    group = get_group(db=db, id=group_id)
+    group = await get_group(db=db, id=group_id)
     if not group:
         raise HTTPError(404, "Group not found")
 
+    etag = make_etag("members", group.id, *await members_version(db, group.id))
+    response = not_modified(request, etag)
+    if response:
+        return response
+
+    memberships = (await db.scalars(
+        select(GroupMember)
+        .where(GroupMember.group_id == group.id)
+        .options(selectinload(GroupMember.user))
+    )).all()
+
     members = [
-        {
-            "id": membership.user.id,
-            "username": membership.user.username,
-            "email": membership.user.email,
-            "avatar": base64_encode(membership.user.avatar) if membership.user.avatar else None,
-            "registration_date": membership.user.registration_date,
-            "role_in_group": membership.role,
-        }
-        for membership in group.member_associations
+        GroupMemberOut(
+            id=membership.user.id,
+            username=membership.user.username,
+            email=membership.user.email,
+            avatar=media_url(membership.user.avatar_hash, "avatar_48"),
+            registration_date=membership.user.registration_date,
+            role_in_group=membership.role
+        )
+        for membership in memberships
     ]
 
-    return members
+    return with_etag(respond(members), etag)
 
 
 @router.get("/name/{group_name}")
 async def get_group_by_name(
     db: db_dependency,
     group_name: str,
+    request: Request,
     current_user: dict = Depends(auth.verify_token)
 ):
-    group = get_group(db=db, name=group_name)
-    if not group:
-        raise HTTPError(404, "Group not found")
-    group_dict = group.__dict__.copy()
-    group_dict["avatar"] = base64_encode(group.avatar)
-    return group_dict
+    async def build():
+        group = await get_group(db=db, name=group_name)
+        if not group:
+            raise HTTPError(404, "Group not found")
+        return respond(serialize_group(group))
+
+    return await serve_cached(request, group_response_cache, ("name", group_name), build)
 
 
 @router.put("/{group_id}/member/{user_id}/role")
@@ -380,27 +428,127 @@ async def update_member_role(
     current_user: dict = Depends(auth.verify_token)
 ):
     # Check if the current user is an admin of the group
-    if not is_group_admin(db, current_user.get("id"), group_id):
+    if not await is_group_admin(db, current_user.get("id"), group_id):
         raise HTTPError(403, "Only group admins can change member roles")
     
     # Get the group member
-    member = db.execute(
+    member = (await db.execute(
         select(GroupMember)
         .where(GroupMember.group_id == group_id)
         .where(GroupMember.user_id == user_id)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     
     if not member:
         raise HTTPError(404, "Member not found in group")
     
     # Update the role
     member.role = role
-    db.commit()
-    db.refresh(member)
+    await db.commit()
+    await db.refresh(member)
+    await invalidate_membership(user_id)
     
     return {"status": "Success", "result": f"Updated role to {role}"}
 
 
+@router.post("/{group_id}/members")
+async def bulk_update_members(
+    db: db_dependency,
+    group_id: int,
+    changes: BulkMembersBM,
+    current_user: dict = Depends(auth.verify_token)
+):
+    # Adds, removes and re-roles many members in one transaction. Users and
+    # memberships are checked with one query each, every user gets a result.
+    if current_user.get("role") != "admin" and not await is_group_admin(db, current_user.get("id"), group_id):
+        raise HTTPError(403, "Only group admins can manage members")
+    group = await get_group(db=db, id=group_id)
+    if not group:
+        raise HTTPError(404, "Group not found")
+
+    requested = (
+        [("add", change.user_id, change.role) for change in changes.add]
+        + [("remove", user_id, None) for user_id in changes.remove]
+        + [("role", change.user_id, change.role) for change in changes.roles]
+    )
+    if len(requested) > BULK_MEMBERS_MAX:
+        raise HTTPError(400, f"At most {BULK_MEMBERS_MAX} changes per request")
+
+    user_ids = {user_id for _, user_id, _ in requested}
+    existing_users = set((await db.scalars(select(User.id).where(User.id.in_(user_ids)))).all())
+    current_roles = dict((await db.execute(
+        select(GroupMember.user_id, GroupMember.role)
+        .where(GroupMember.group_id == group_id, GroupMember.user_id.in_(user_ids))
+    )).all())
+
+    results = []
+    seen = set()
+    to_add, to_remove, to_role = {}, [], {}
+    for action, user_id, role in requested:
+        if user_id in seen:
+            outcome = "Duplicate user in request"
+        elif user_id not in existing_users:
+            outcome = "User not found"
+        elif role is not None and role not in GROUP_ROLES:
+            outcome = "Invalid role"
+        elif action == "add":
+            if user_id in current_roles:
+                outcome = "Already a member"
+            else:
+                to_add[user_id] = role
+                outcome = "Added"
+        elif user_id not in current_roles:
+            outcome = "Not a member"
+        elif action == "remove":
+            to_remove.append(user_id)
+            outcome = "Removed"
+        else:
+            to_role[user_id] = role
+            outcome = f"Updated role to {role}"
+        seen.add(user_id)
+        results.append({"user_id": user_id, "action": action, "result": outcome})
+
+    # Same rule as remove_member: the group keeps at least one admin
+    admins_left = await db.scalar(
+        select(func.count())
+        .select_from(GroupMember)
+        .where(GroupMember.group_id == group_id, GroupMember.role == "admin")
+    )
+    admins_left -= sum(1 for user_id in to_remove if current_roles[user_id] == "admin")
+    admins_left += sum(
+        (role == "admin") - (current_roles[user_id] == "admin") for user_id, role in to_role.items()
+    )
+    admins_left += sum(1 for role in to_add.values() if role == "admin")
+    if admins_left < 1:
+        raise HTTPError(400, "Cannot remove the last admin of the group")
+
+    if to_add:
+        await db.execute(
+            insert(GroupMember),
+            [{"user_id": user_id, "group_id": group_id, "role": role} for user_id, role in to_add.items()]
+        )
+        await backfill_timelines(db, list(to_add), group_id)
+    if to_remove:
+        await db.execute(
+            delete(GroupMember)
+            .where(GroupMember.group_id == group_id, GroupMember.user_id.in_(to_remove))
+        )
+        await drop_members_entries(db, to_remove, group_id)
+    for role in set(to_role.values()):
+        await db.execute(
+            update(GroupMember)
+            .where(
+                GroupMember.group_id == group_id,
+                GroupMember.user_id.in_([user_id for user_id, r in to_role.items() if r == role])
+            )
+            .values(role=role)
+        )
+    await db.commit()
+    for user_id in [*to_add, *to_remove, *to_role]:
+        await invalidate_membership(user_id)
+
+    return {"status": "Success", "result": results}
+
+
 @router.delete("/{group_id}/member/{user_id}")
 async def remove_member(
     db: db_dependency,
@@ -409,32 +557,35 @@ async def remove_member(
     current_user: dict = Depends(auth.verify_token)
 ):
     # Check if the current user is an admin of the group
-    if not is_group_admin(db, current_user.get("id"), group_id):
+    if not await is_group_admin(db, current_user.get("id"), group_id):
         raise HTTPError(403, "Only group admins can remove members")
     
     # Get the group member
-    member = db.execute(
+    member = (await db.execute(
         select(GroupMember)
         .where(GroupMember.group_id == group_id)
         .where(GroupMember.user_id == user_id)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     
     if not member:
         raise HTTPError(404, "Member not found in group")
     
     # Don't allow removing the last admin
     if member.role == "admin":
-        admin_count = db.execute(
-            select(GroupMember)
+        admin_count = await db.scalar(
+            select(func.count())
+            .select_from(GroupMember)
             .where(GroupMember.group_id == group_id)
             .where(GroupMember.role == "admin")
-        ).count()
+        )
         if admin_count <= 1:
             raise HTTPError(400, "Cannot remove the last admin of the group")
     
     # Remove the member
-    db.delete(member)
-    db.commit()
+    await db.delete(member)
+    await drop_membership_entries(db, user_id, group_id)
+    await db.commit()
+    await invalidate_membership(user_id)
     
     return {"status": "Success", "result": "Member removed from group"}
 
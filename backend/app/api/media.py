@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from app.db import db_dependency
+from app.dbmodels import MediaVariant
+from app.storage import get_blob_store, is_blob_hash, sniff_content_type
+from app.api.user import HTTPError
+
+
+router = APIRouter(
+    prefix='/media',
+    tags=['Media']
+)
+
+CHUNK_SIZE = 64 * 1024
+
+# Blobs are content addressed, so a URL always points at the same bytes
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def parse_range(header: str, size: int):
+    # Only single "bytes=start-end" ranges are supported
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    try:
+        if start:
+            start = int(start)
+            end = int(end) if end else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(end)
+            if length <= 0:
+                return None
+            start = max(size - length, 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, min(end, size - 1)
+
+def iter_file(f, start: int, length: int):
+    try:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+@router.get("/{blob_hash}")
+async def get_media(
+    blob_hash: str,
+    request: Request,
+    db: db_dependency,
+    variant: Optional[str] = None
+):
+    store = get_blob_store()
+    if not is_blob_hash(blob_hash):
+        raise HTTPError(404, "Media not found")
+
+    # Serve the resized variant when one was generated, the original otherwise
+    if variant:
+        media_variant = await db.get(MediaVariant, (blob_hash, variant))
+        if media_variant:
+            blob_hash = media_variant.blob_hash
+
+    if not await run_in_threadpool(store.exists, blob_hash):
+        raise HTTPError(404, "Media not found")
+
+    etag = f'"{blob_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    # Stat and open the file off the event loop, the body is streamed from a
+    # threadpool by StreamingResponse anyway
+    size = await run_in_threadpool(store.size, blob_hash)
+    f = await run_in_threadpool(store.open, blob_hash)
+    content_type = sniff_content_type(await run_in_threadpool(f.read, 16))
+
+    range_header = request.headers.get("range")
+    if range_header and size > 0:
+        byte_range = parse_range(range_header, size)
+        if byte_range is None:
+            f.close()
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        length = end - start + 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(length)
+        return StreamingResponse(iter_file(f, start, length), status_code=206, media_type=content_type, headers=headers)
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(iter_file(f, 0, size), media_type=content_type, headers=headers)
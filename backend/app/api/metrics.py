@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.metrics import render
+
+
+# Prometheus scrape target. Unauthenticated like most exporters, keep it off
+# the public ingress or turn it off with METRICS=0.
+router = APIRouter(
+    tags=['Metrics']
+)
+
+
+@router.get("/metrics")
+async def get_metrics():
+    return Response(content=render(), media_type=CONTENT_TYPE_LATEST)
@@ -1,26 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select, delete, and_, desc, func
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import Optional
 from datetime import datetime, timezone
 from app.db import db_dependency 
-from app.dbmodels import User, Group, GroupMember, Post, Comment, Reaction
+from app.dbmodels import Post, Comment, Reaction
 from app.api.auth import verify_token
 from app.api.user import get_user, HTTPError
-from app.api.group import is_user_in_group
-import base64
+from app.feed import (
+    paginate_feed, paginate_timeline, paginate_comments, post_authors, comment_authors,
+    serialize_post, serialize_comment, viewer_reactions
+)
+from app.images import ingest_image, POST_VARIANTS
+from app.search import search_posts
+from app.membership import user_memberships, group_role
+from app.timeline import TIMELINE_FANOUT, fan_out_post, drop_post_entries
+from app.schemas import PostOut, respond
+from app.streaming import stream_batches, ndjson_response
+from app.conditional import make_etag, not_modified, with_etag, touch_feeds, touch_post, feeds_version
+from app.counters import REACTION_TYPES, bump_counter, bump_reaction_counter, toggle_reaction
 
 router = APIRouter(
     prefix='/posts',
     tags=['Posts']
 )
 
-def get_group_member(db: Session, user_id: int, group_id: int):
-    stmt = select(GroupMember).where(
-        GroupMember.user_id == user_id,
-        GroupMember.group_id == group_id
-    )
-    return db.execute(stmt).scalar_one_or_none()
+async def get_group_member(db: AsyncSession, user_id: int, group_id: int) -> Optional[str]:
+    # The user's role in the group (None if not a member), from the membership cache
+    return await group_role(db, user_id, group_id)
 
 @router.post('/')
 async def create_post(
@@ -30,26 +37,30 @@ async def create_post(
     image: Optional[UploadFile] = File(None),
     current_user: dict = Depends(verify_token)
 ):
-    user = get_user(db=db, id=current_user.get("id"))
+    user = await get_user(db=db, id=current_user.get("id"))
     if not user:
         raise HTTPError(403, 'User not found')
 
-    member = get_group_member(db, user.id, group_id)
+    member = await get_group_member(db, user.id, group_id)
     if not member:
         raise HTTPError(403, 'You are not a member of this group')
 
     image_data = await image.read() if image else None
+    image_hash = await ingest_image(db, image_data, POST_VARIANTS)
 
     post = Post(
         group_id=group_id,
         user_id=user.id,
         content=content,
-        image=image_data,
+        image_hash=image_hash,
         created_at=datetime.now(timezone.utc)
     )
     db.add(post)
-    db.commit()
-    db.refresh(post)
+    await db.flush()
+    await fan_out_post(db, post)
+    await touch_feeds(db, [group_id])
+    await db.commit()
+    await db.refresh(post)
     return {"status": "success", "post_id": post.id}
 
 @router.get("/my")
@@ -59,111 +70,92 @@ async def get_my_posts(
 ):
     user_id = current_user['id']
     stmt = select(Post).where(Post.user_id == user_id).order_by(Post.created_at.desc())
-    posts = db.scalars(stmt).all()
-    # return [{
-    #     **post.__dict__,
-    #     'user': {
-    #         'id': post.user.id,
-    #         'username': post.user.username,
-    #         'avatar': f"data:image/png;base64,{base64.b64encode(post.user.avatar).decode("utf-8")}"
-    #     }
-    # } for post in posts]
-    posts_list = []
-    for post in posts:
-        user_dict = post.__dict__.copy()
-        if post.image:
-            image_base64 = base64.b64encode(post.image).decode("utf-8")
-            user_dict["image"] = f"data:image/png;base64,{image_base64}"
-        posts_list.append(user_dict)
-    return posts_list
+    posts = (await db.scalars(stmt)).all()
+    authors = await post_authors(db, posts)
+    return respond([serialize_post(post, authors) for post in posts])
+
+@router.get("/my/comments")
+async def get_my_comments(
+    db: db_dependency,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: dict = Depends(verify_token)
+):
+    # The user's comments, newest first, in the groups they still belong
+    # to. The posts they are on come along without their comment previews.
+    user_id = current_user['id']
+    user_groups = list(await user_memberships(db, user_id))
+    result = await paginate_comments(
+        db,
+        Comment.user_id == user_id,
+        Comment.post_id.in_(select(Post.id).where(Post.group_id.in_(user_groups))),
+        viewer_id=user_id,
+        limit=limit,
+        cursor=cursor
+    )
+    post_ids = {comment.post_id for comment in result["comments"]}
+    posts = (await db.scalars(select(Post).where(Post.id.in_(post_ids)))).all()
+    authors = await post_authors(db, posts)
+    result["posts"] = [serialize_post(post, authors, schema=PostOut) for post in posts]
+    return respond(result)
 
 @router.get("/my-groups")
 async def get_my_groups_posts(
     db: db_dependency,
+    request: Request,
     current_user: dict = Depends(verify_token),
     page: int = Query(1, ge=1),
-    per_page: int = Query(10, ge=1, le=50)
+    per_page: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True)
 ):
     try:
         user_id = current_user['id']
         
         # Get user's groups
-        user_groups = db.scalars(
-            select(GroupMember.group_id)
-            .where(GroupMember.user_id == user_id)
-        ).all()
+        user_groups = list(await user_memberships(db, user_id))
         
         if not user_groups:
             return {
                 "posts": [],
-                "total": 0,
+                "total": 0 if include_total else None,
                 "page": page,
                 "per_page": per_page,
-                "total_pages": 0
+                "total_pages": 0 if include_total else None,
+                "next_cursor": None
             }
         
-        # Calculate offset
-        offset = (page - 1) * per_page
-        
-        # Get total count for pagination
-        count_query = select(func.count()).select_from(Post).where(Post.group_id.in_(user_groups))
-        total_count = db.scalar(count_query)
-        
-        # Get paginated posts
-        stmt = select(Post).where(
-            Post.group_id.in_(user_groups)
-        ).order_by(desc(Post.created_at)).offset(offset).limit(per_page)
-        
-        posts = db.execute(stmt).scalars().all()
-        posts_list = []
-        for post in posts:
-            post_dict = post.__dict__.copy()
-            
-            # Handle user data safely
-            if post.user:
-                post_dict['user'] = {
-                    'id': post.user.id,
-                    'username': post.user.username,
-                    'avatar': base64.b64encode(post.user.avatar).decode('utf-8') if post.user.avatar else None
-                }
-            else:
-                post_dict['user'] = {
-                    'id': None,
-                    'username': 'Unknown User',
-                    'avatar': None
-                }
-            
-            # Get reactions
-            reactions = db.scalars(select(Reaction).where(Reaction.post_id == post.id)).all()
-            post_dict['reactions'] = reactions
-            
-            # Get comments
-            comments = db.scalars(select(Comment).where(Comment.post_id == post.id)).all()
-            post_dict['comments'] = [{
-                **comment.__dict__,
-                'user': {
-                    'id': comment.user.id,
-                    'username': comment.user.username,
-                    'avatar': base64.b64encode(comment.user.avatar).decode('utf-8') if comment.user.avatar else None
-                } if comment.user else None
-            } for comment in comments]
-            
-            # Handle image data
-            if post.image:
-                try:
-                    post_dict["image"] = f"data:image/png;base64,{base64.b64encode(post.image).decode('utf-8')}"
-                except:
-                    post_dict["image"] = None
-            
-            posts_list.append(post_dict)
-            
-        return {
-            "posts": posts_list,
-            "total": total_count,
-            "page": page,
-            "per_page": per_page,
-            "total_pages": (total_count + per_page - 1) // per_page
-        }
+        etag = make_etag(
+            "feed", user_id, sorted(user_groups), await feeds_version(db, user_groups),
+            page, per_page, cursor, include_total
+        )
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        if TIMELINE_FANOUT:
+            result = await paginate_timeline(
+                db,
+                user_id,
+                user_groups,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                include_total=include_total
+            )
+        else:
+            result = await paginate_feed(
+                db,
+                Post.group_id.in_(user_groups),
+                page=page,
+                per_page=per_page,
+                viewer_id=current_user['id'],
+                cursor=cursor,
+                include_total=include_total
+            )
+        return with_etag(respond(result), etag)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_my_groups_posts: {str(e)}")
         raise HTTPError(500, f"Internal server error: {str(e)}")
@@ -172,101 +164,91 @@ async def get_my_groups_posts(
 async def get_group_posts(
     group_id: int,
     db: db_dependency,
+    request: Request,
     current_user: dict = Depends(verify_token),
     page: int = Query(1, ge=1),
-    per_page: int = Query(10, ge=1, le=50)
+    per_page: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True)
 ):
     try:
-        member = get_group_member(db, current_user['id'], group_id)
+        member = await get_group_member(db, current_user['id'], group_id)
         if not member:
             raise HTTPError(403, "Not a member of this group")
 
-        # Calculate offset
-        offset = (page - 1) * per_page
-
-        # Get total count for pagination
-        total_count = db.scalar(
-            select(func.count()).select_from(Post).where(Post.group_id == group_id)
+        etag = make_etag(
+            "group_feed", current_user['id'], group_id, await feeds_version(db, [group_id]),
+            page, per_page, cursor, include_total
         )
-
-        # Get paginated posts
-        stmt = select(Post).where(
-            Post.group_id == group_id
-        ).order_by(desc(Post.created_at)).offset(offset).limit(per_page)
-        
-        posts = db.scalars(stmt).all()
-        posts_list = []
-        
-        for post in posts:
-            post_dict = post.__dict__.copy()
-            
-            # Handle user data safely
-            if post.user:
-                post_dict['user'] = {
-                    'id': post.user.id,
-                    'username': post.user.username,
-                    'avatar': base64.b64encode(post.user.avatar).decode('utf-8') if post.user.avatar else None
-                }
-            else:
-                post_dict['user'] = {
-                    'id': None,
-                    'username': 'Unknown User',
-                    'avatar': None
-                }
-            
-            # Get reactions
-            reactions = db.scalars(select(Reaction).where(Reaction.post_id == post.id)).all()
-            post_dict['reactions'] = reactions
-            
-            # Get comments
-            comments = db.scalars(select(Comment).where(Comment.post_id == post.id)).all()
-            post_dict['comments'] = [{
-                **comment.__dict__,
-                'user': {
-                    'id': comment.user.id,
-                    'username': comment.user.username,
-                    'avatar': base64.b64encode(comment.user.avatar).decode('utf-8') if comment.user.avatar else None
-                } if comment.user else None
-            } for comment in comments]
-            
-            # Handle image data
-            if post.image:
-                try:
-                    post_dict["image"] = f"data:image/png;base64,{base64.b64encode(post.image).decode('utf-8')}"
-                except:
-                    post_dict["image"] = None
-            
-            posts_list.append(post_dict)
-            
-        return {
-            "posts": posts_list,
-            "total": total_count,
-            "page": page,
-            "per_page": per_page,
-            "total_pages": (total_count + per_page - 1) // per_page
-        }
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        result = await paginate_feed(
+            db,
+            Post.group_id == group_id,
+            page=page,
+            per_page=per_page,
+            viewer_id=current_user['id'],
+            cursor=cursor,
+            include_total=include_total
+        )
+        return with_etag(respond(result), etag)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_group_posts: {str(e)}")
         raise HTTPError(500, f"Internal server error: {str(e)}")
 
 @router.get("/admin/all")
 async def get_all_posts_admin(
-    db: db_dependency,
+    group_id: Optional[int] = Query(None),
+    user_id: Optional[int] = Query(None),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
     current_user: dict = Depends(verify_token)
 ):
-    if not current_user.get("is_admin"):
+    if current_user.get("role") != "admin":
         raise HTTPError(403, "Admin only")
 
-    stmt = select(Post).order_by(Post.created_at.desc())
-    posts = db.scalars(stmt).all()
-    return [{
-        **post.__dict__,
-        'user': {
-            'id': post.user.id,
-            'username': post.user.username,
-            'avatar': post.user.avatar
-        }
-    } for post in posts]
+    filters = []
+    if group_id:
+        filters.append(Post.group_id == group_id)
+    if user_id:
+        filters.append(Post.user_id == user_id)
+    if since:
+        filters.append(Post.created_at >= since)
+    if until:
+        filters.append(Post.created_at < until)
+    stmt = select(Post).where(*filters).order_by(Post.created_at.desc(), Post.id.desc()).limit(limit)
+
+    async def posts():
+        async for db, batch in stream_batches(stmt):
+            authors = await post_authors(db, batch, cached=False)
+            for post in batch:
+                yield serialize_post(post, authors, schema=PostOut)
+
+    # NDJSON, one post per line
+    return ndjson_response(posts())
+
+@router.get("/search")
+async def search_my_posts(
+    db: db_dependency,
+    q: str,
+    group_id: Optional[int] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
+    current_user: dict = Depends(verify_token)
+):
+    return respond(await search_posts(
+        db,
+        q,
+        viewer_id=current_user['id'],
+        group_id=group_id,
+        limit=limit,
+        cursor=cursor
+    ))
 
 @router.put("/{post_id}")
 async def edit_post(
@@ -275,7 +257,7 @@ async def edit_post(
     db: db_dependency,
     current_user: dict = Depends(verify_token)
 ):
-    post = db.get(Post, post_id)
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPError(404, "Post not found")
 
@@ -283,9 +265,10 @@ async def edit_post(
         raise HTTPError(403, "You can only edit your own post")
 
     post.content = content
-    db.commit()
-    db.refresh(post)
-    return {"status": "Post updated", "post": post}
+    await touch_feeds(db, [post.group_id])
+    await db.commit()
+    await db.refresh(post)
+    return respond({"status": "Post updated", "post": serialize_post(post, await post_authors(db, [post]))})
 
 @router.post('/{post_id}/comment')
 async def comment_on_post(
@@ -296,11 +279,11 @@ async def comment_on_post(
 ):
     try:
         user_id = current_user['id']
-        post = db.get(Post, post_id)
+        post = await db.get(Post, post_id)
         if not post:
             raise HTTPError(404, 'Post does not exist')
 
-        member = get_group_member(db, user_id, post.group_id)
+        member = await get_group_member(db, user_id, post.group_id)
         if not member:
             raise HTTPError(403, 'You have to belong to the group to comment')
 
@@ -311,24 +294,43 @@ async def comment_on_post(
             created_at=datetime.now(timezone.utc)
         )
         db.add(comment)
-        db.commit()
-        db.refresh(comment)
+        await bump_counter(db, Post, post_id, "comment_count", 1)
+        await touch_feeds(db, [post.group_id])
+        await db.commit()
+        await db.refresh(comment)
 
         # Return the comment with user data
-        return {
-            "id": comment.id,
-            "text": comment.text,
-            "created_at": comment.created_at,
-            "user": {
-                "id": comment.user.id,
-                "username": comment.user.username,
-                "avatar": base64.b64encode(comment.user.avatar).decode('utf-8') if comment.user.avatar else None
-            }
-        }
+        return respond(serialize_comment(comment, await comment_authors(db, [comment])))
     except Exception as e:
         print(f"Error in comment_on_post: {str(e)}")
         raise HTTPError(500, f"Internal server error: {str(e)}")
 
+@router.get("/{post_id}/comments")
+async def get_post_comments(
+    db: db_dependency,
+    post_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: dict = Depends(verify_token)
+):
+    post = await db.get(Post, post_id)
+    if not post:
+        raise HTTPError(404, "Post not found")
+
+    member = await get_group_member(db, current_user['id'], post.group_id)
+    if not member:
+        raise HTTPError(403, "You must be in the group")
+
+    result = await paginate_comments(
+        db,
+        Comment.post_id == post_id,
+        viewer_id=current_user['id'],
+        limit=limit,
+        cursor=cursor
+    )
+    result["comment_count"] = post.comment_count
+    return respond(result)
+
 @router.post("/{post_id}/reaction")
 async def react_to_post(
     db: db_dependency,
@@ -336,58 +338,25 @@ async def react_to_post(
     reaction_type: str,
     current_user: dict = Depends(verify_token)
 ):
+    if reaction_type not in REACTION_TYPES:
+        raise HTTPError(400, "Unknown reaction type")
     user_id = current_user["id"]
-    post = db.get(Post, post_id)
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPError(404, "Post does not exist")
 
-    member = get_group_member(db, user_id, post.group_id)
+    member = await get_group_member(db, user_id, post.group_id)
     if not member:
         raise HTTPError(403, "You have to belong to the group to react")
 
-    # Check if user already has a reaction of this type
-    existing_reaction = db.scalars(
-        select(Reaction).where(
-            and_(
-                Reaction.post_id == post_id,
-                Reaction.user_id == user_id,
-                Reaction.type == reaction_type
-            )
-        )
-    ).first()
-
-    if existing_reaction:
-        # If reaction exists, remove it (toggle off)
-        db.delete(existing_reaction)
-        db.commit()
-        return {"status": "Reaction removed"}
-
-    # Check if user has an opposite reaction
-    opposite_type = "dislike" if reaction_type == "like" else "like"
-    opposite_reaction = db.scalars(
-        select(Reaction).where(
-            and_(
-                Reaction.post_id == post_id,
-                Reaction.user_id == user_id,
-                Reaction.type == opposite_type
-            )
-        )
-    ).first()
-
-    if opposite_reaction:
-        # Remove the opposite reaction
-        db.delete(opposite_reaction)
-
-    # Add the new reaction
-    reaction = Reaction(
-        post_id=post_id,
-        user_id=user_id,
-        type=reaction_type,
-        created_at=datetime.now(timezone.utc)
-    )
-    db.add(reaction)
-    db.commit()
-    return {"status": "Reaction added"}
+    my_reaction, counts = await toggle_reaction(db, Post, post_id, user_id, reaction_type)
+    await touch_feeds(db, [post.group_id])
+    await db.commit()
+    return {
+        "status": "Reaction added" if my_reaction else "Reaction removed",
+        "my_reaction": my_reaction,
+        **counts
+    }
 
 @router.post("/comments/{comment_id}/reaction")
 async def react_to_comment(
@@ -396,58 +365,25 @@ async def react_to_comment(
     reaction_type: str,
     current_user: dict = Depends(verify_token)
 ):
-    comment = db.get(Comment, comment_id)
+    if reaction_type not in REACTION_TYPES:
+        raise HTTPError(400, "Unknown reaction type")
+    comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPError(404, "Comment does not exist")
 
-    post = db.get(Post, comment.post_id)
-    member = get_group_member(db, current_user["id"], post.group_id)
+    post = await db.get(Post, comment.post_id)
+    member = await get_group_member(db, current_user["id"], post.group_id)
     if not member:
         raise HTTPError(403, "Not in group")
 
-    # Check if user already has a reaction of this type
-    existing_reaction = db.scalars(
-        select(Reaction).where(
-            and_(
-                Reaction.comment_id == comment_id,
-                Reaction.user_id == current_user["id"],
-                Reaction.type == reaction_type
-            )
-        )
-    ).first()
-
-    if existing_reaction:
-        # If reaction exists, remove it (toggle off)
-        db.delete(existing_reaction)
-        db.commit()
-        return {"status": "Reaction removed"}
-
-    # Check if user has an opposite reaction
-    opposite_type = "dislike" if reaction_type == "like" else "like"
-    opposite_reaction = db.scalars(
-        select(Reaction).where(
-            and_(
-                Reaction.comment_id == comment_id,
-                Reaction.user_id == current_user["id"],
-                Reaction.type == opposite_type
-            )
-        )
-    ).first()
-
-    if opposite_reaction:
-        # Remove the opposite reaction
-        db.delete(opposite_reaction)
-
-    # Add the new reaction
-    reaction = Reaction(
-        comment_id=comment_id,
-        user_id=current_user["id"],
-        type=reaction_type,
-        created_at=datetime.now(timezone.utc)
-    )
-    db.add(reaction)
-    db.commit()
-    return {"status": "Reaction added"}
+    my_reaction, counts = await toggle_reaction(db, Comment, comment_id, current_user["id"], reaction_type)
+    await touch_feeds(db, [post.group_id])
+    await db.commit()
+    return {
+        "status": "Reaction added" if my_reaction else "Reaction removed",
+        "my_reaction": my_reaction,
+        **counts
+    }
 
 @router.delete("/comment/{comment_id}")
 async def delete_comment(
@@ -455,15 +391,17 @@ async def delete_comment(
     db: db_dependency,
     current_user: dict = Depends(verify_token)
 ):
-    comment = db.get(Comment, comment_id)
+    comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPError(404, "Comment not found")
 
     if comment.user_id != current_user["id"]:
         raise HTTPError(403, "You can delete only your own comment")
 
-    db.delete(comment)
-    db.commit()
+    await db.delete(comment)
+    await bump_counter(db, Post, comment.post_id, "comment_count", -1)
+    await touch_post(db, comment.post_id)
+    await db.commit()
     return {"status": "Comment deleted"}
 
 @router.delete("/reaction/{reaction_id}")
@@ -472,15 +410,22 @@ async def delete_reaction(
     db: db_dependency,
     current_user: dict = Depends(verify_token)
 ):
-    reaction = db.get(Reaction, reaction_id)
+    reaction = await db.get(Reaction, reaction_id)
     if not reaction:
         raise HTTPError(404, "Reaction not found")
 
     if reaction.user_id != current_user["id"]:
         raise HTTPError(403, "You can delete only your own reaction")
 
-    db.delete(reaction)
-    db.commit()
+    await db.delete(reaction)
+    if reaction.type in REACTION_TYPES:
+        if reaction.comment_id:
+            await bump_reaction_counter(db, Comment, reaction.comment_id, reaction.type, -1)
+            await touch_post(db, await db.scalar(select(Comment.post_id).where(Comment.id == reaction.comment_id)))
+        else:
+            await bump_reaction_counter(db, Post, reaction.post_id, reaction.type, -1)
+            await touch_post(db, reaction.post_id)
+    await db.commit()
     return {"status": "Reaction deleted"}
 
 @router.delete("/post/{post_id}")
@@ -489,22 +434,24 @@ async def delete_post_with_comments_reactions(
     post_id: int,
     current_user: dict = Depends(verify_token)
 ):
-    post = db.get(Post, post_id)
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPError(404, "Post does not exist")
 
     user_id = current_user["id"]
     
     # Get the group member to check admin status
-    member = get_group_member(db, user_id, post.group_id)
-    is_admin = member and member.role == "admin"
+    member = await get_group_member(db, user_id, post.group_id)
+    is_admin = member == "admin"
     
     # Allow deletion if user is post owner or admin
     if post.user_id != user_id and not is_admin:
         raise HTTPError(403, "You don't have permission to delete this post")
 
-    db.delete(post)
-    db.commit()
+    await drop_post_entries(db, post_id)
+    await db.delete(post)
+    await touch_feeds(db, [post.group_id])
+    await db.commit()
 
     return {"status": "Success", "result": "Removed"}
 
@@ -512,47 +459,35 @@ async def delete_post_with_comments_reactions(
 async def get_post_detail(
     post_id: int,
     db: db_dependency,
+    limit: int = Query(20, ge=1, le=100),
     current_user: dict = Depends(verify_token)
 ):
     try:
-        post = db.get(Post, post_id)
+        post = await db.get(Post, post_id)
         if not post:
             raise HTTPError(404, "Post not found")
 
-        member = get_group_member(db, current_user['id'], post.group_id)
+        member = await get_group_member(db, current_user['id'], post.group_id)
         if not member:
             raise HTTPError(403, "You must be in the group")
 
-        comments = db.scalars(select(Comment).where(Comment.post_id == post_id)).all()
-        reactions = db.scalars(select(Reaction).where(Reaction.post_id == post_id)).all()
-        
-        # Handle image data safely
-        post_dict = post.__dict__.copy()
-        if post.image:
-            try:
-                post_dict["image"] = f"data:image/png;base64,{base64.b64encode(post.image).decode('utf-8')}"
-            except:
-                post_dict["image"] = None
-        
-        return {
-            "post": {
-                **post_dict,
-                'user': {
-                    'id': post.user.id,
-                    'username': post.user.username,
-                    'avatar': base64.b64encode(post.user.avatar).decode('utf-8') if post.user.avatar else None
-                }
-            },
-            "comments": [{
-                **comment.__dict__,
-                'user': {
-                    'id': comment.user.id,
-                    'username': comment.user.username,
-                    'avatar': base64.b64encode(comment.user.avatar).decode('utf-8') if comment.user.avatar else None
-                }
-            } for comment in comments],
-            "reactions": reactions
-        }
+        # The post alone, its comments are paged like GET /{post_id}/comments:
+        # next_cursor carries on from there
+        post_out = serialize_post(post, await post_authors(db, [post]), "full")
+        my_reactions = await viewer_reactions(db, current_user['id'], Reaction.post_id, [post.id])
+        post_out.my_reaction = my_reactions.get(post.id)
+        result = await paginate_comments(
+            db,
+            Comment.post_id == post_id,
+            viewer_id=current_user['id'],
+            limit=limit
+        )
+        return respond({
+            "post": post_out,
+            **result
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_post_detail: {str(e)}")
         raise HTTPError(500, f"Internal server error: {str(e)}")
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+import app.api.auth as auth
+from app.api.user import HTTPError
+from app.cache import cache_stats as shared_cache_stats
+from app.metrics import route_stats
+
+
+router = APIRouter(
+    prefix='/system',
+    tags=['System']
+)
+
+
+@router.get("/cache")
+async def cache_stats(
+    current_user: dict = Depends(auth.verify_token)
+):
+    if current_user.get("role") != "admin":
+        raise HTTPError(403, "Insufficient permissions")
+    return await shared_cache_stats()
+
+
+@router.get("/requests")
+async def request_stats(
+    current_user: dict = Depends(auth.verify_token)
+):
+    # Latency, SQL statement and SQL time histograms per route, from the
+    # Prometheus metrics (every worker with PROMETHEUS_MULTIPROC_DIR set)
+    if current_user.get("role") != "admin":
+        raise HTTPError(403, "Insufficient permissions")
+    return route_stats()
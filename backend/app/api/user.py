@@ -1,15 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form, Query, Request
 from pydantic import BaseModel
 from app.db import db_dependency
 from app.dbmodels import User
 from datetime import datetime, timezone, timedelta
-from app.api.auth import pwd_context
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import Select, or_
 from typing import Optional
 import app.api.auth as auth
 from fastapi.security import OAuth2PasswordRequestForm
-import base64
+from app.images import ingest_image, AVATAR_VARIANTS
+from app.storage import media_url
+from app.avatars import invalidate_user_avatar
+from app.membership import invalidate_membership
+from app.timeline import drop_user_entries
+from app.schemas import UserOut, respond
+from app.streaming import stream_batches, ndjson_response
+from app.conditional import make_etag, not_modified, with_etag, touch_author
 
 
 router = APIRouter(
@@ -26,7 +32,7 @@ class UserUpdateBM(BaseModel):
     password: Optional[str] = None
     email: Optional[str] = None
 
-def get_user(db: Session, username: str = None, email: str = None, id: int = None):
+async def get_user(db: AsyncSession, username: str = None, email: str = None, id: int = None):
     filters = []
 
     if email:
@@ -40,22 +46,36 @@ def get_user(db: Session, username: str = None, email: str = None, id: int = Non
         return None
     stmt = Select(User).where(or_(*filters))
 
-    return db.execute(stmt).scalar_one_or_none()
+    return (await db.execute(stmt)).scalar_one_or_none()
 
 def HTTPError(code: int, detail:str):
     return HTTPException(status_code=code, detail=detail)
 
+def serialize_user(user: User):
+    return UserOut(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        registration_date=user.registration_date,
+        role=user.role,
+        status=user.status,
+        avatar=media_url(user.avatar_hash)
+    )
+
+def user_etag(user: User):
+    return make_etag("user", user.id, user.updated_at, user.avatar_hash)
+
 
 
 @router.post("/register")
 async def add_user(user: UserCreateBM, db: db_dependency):
-    userdb = get_user(db=db, username=user.username)
+    userdb = await get_user(db=db, username=user.username)
     if userdb:
         raise HTTPError(400, "Username is already taken")
-    userdb = get_user(db=db, email=user.email)
+    userdb = await get_user(db=db, email=user.email)
     if userdb:
         raise HTTPError(400, "email is already taken")
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await auth.hash_password(user.password)
     db_user = User(
         username = user.username,
         hashed_password = hashed_password,
@@ -63,13 +83,13 @@ async def add_user(user: UserCreateBM, db: db_dependency):
         registration_date = datetime.now(timezone.utc)
     )
     db.add(db_user)
-    db.commit()
+    await db.commit()
     return {"username": user.username, "message": "user created"}
 
 
 @router.post("/login")
-def login(db: db_dependency, form_data: OAuth2PasswordRequestForm = Depends()):
-    user = auth.authenticate_user(form_data.username, form_data.password, db)
+async def login(db: db_dependency, form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await auth.authenticate_user(form_data.username, form_data.password, db)
     if not user:
         raise HTTPError(401, "Invalid user or password")
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -85,11 +105,11 @@ def login(db: db_dependency, form_data: OAuth2PasswordRequestForm = Depends()):
 
 @router.get("/")
 async def get_users(
-    db: db_dependency,
     username: Optional[str] = None,
     email: Optional[str] = None,
     role: Optional[str] = None,
     status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
     current_user: dict = Depends(auth.verify_token)
     ):
     if current_user.get("role") != "admin":
@@ -105,40 +125,30 @@ async def get_users(
     if status:
         filters.append(User.status == status)
     
-    stmt = Select(User).where(*filters)
-    users = db.execute(stmt).scalars().all()
+    stmt = Select(User).where(*filters).order_by(User.id).limit(limit)
 
-    users_list = []
-    for user in users:
-        user_dict = user.__dict__.copy()
-        user_dict.pop("hashed_password", None)
+    async def users():
+        async for db, batch in stream_batches(stmt):
+            for user in batch:
+                yield serialize_user(user)
 
-        if user.avatar:
-            avatar_base64 = base64.b64encode(user.avatar).decode("utf-8")
-            user_dict["avatar"] = f"data:image/png;base64,{avatar_base64}"
-        
-        users_list.append(user_dict)
-
-    return users_list
+    # NDJSON, one user per line
+    return ndjson_response(users())
 
 
 @router.get("/me")
 async def user_me(
     db: db_dependency, 
+    request: Request,
     current_user: dict = Depends(auth.verify_token)
 ):
     try:
-        user = get_user(db=db,id=current_user.get("id"))
+        user = await get_user(db=db,id=current_user.get("id"))
         if not user:
             raise HTTPError(404,"User does not exist")
         
-        user_dict = user.__dict__.copy()
-        user_dict.pop("hashed_password", None)
-        if user.avatar:
-            avatar_base64 = base64.b64encode(user.avatar).decode("utf-8")
-            user_dict["avatar"] = f"data:image/png;base64,{avatar_base64}"
-
-        return user_dict
+        etag = user_etag(user)
+        return not_modified(request, etag) or with_etag(respond(serialize_user(user)), etag)
     except Exception as e:
         raise HTTPError(500, f"Internal server error: {str(e)}")
 
@@ -148,21 +158,17 @@ async def user_me(
 async def get_specific_user(
     user_id: int,
     db: db_dependency, 
+    request: Request,
     current_user: dict = Depends(auth.verify_token) 
 ):
     if current_user.get("role") != "admin" and current_user.get("id") != user_id:
         raise HTTPError(403, "Insufficient permissions")
-    user = get_user(db=db, id=user_id)
+    user = await get_user(db=db, id=user_id)
     if not user:
         raise HTTPError(404,"User does not exist")
     
-    user_dict = user.__dict__.copy()
-    user_dict.pop("hashed_password", None)
-    if user.avatar:
-        avatar_base64 = base64.b64encode(user.avatar).decode("utf-8")
-        user_dict["avatar"] = f"data:image/png;base64,{avatar_base64}"
-
-    return user_dict
+    etag = user_etag(user)
+    return not_modified(request, etag) or with_etag(respond(serialize_user(user)), etag)
 
 
 
@@ -177,22 +183,24 @@ async def get_specific_user(
 ):
     if current_user.get("role") != "admin" and current_user.get("id") != user_id:
         raise HTTPError(403, "Insufficient permissions")
-    user = get_user(db=db,id=user_id)
+    user = await get_user(db=db,id=user_id)
     if not user:
         raise HTTPError(404, "User does not exist")
     if email:
-        email_in_use = get_user(db=db,email=email)
+        email_in_use = await get_user(db=db,email=email)
         if email_in_use:
             raise HTTPError(400,"Email is already in use")
         user.email = email
     if password:
-        hashed_password = pwd_context.hash(password)
+        hashed_password = await auth.hash_password(password)
         user.hashed_password = hashed_password
     if avatar:
         avatar_bytes = await avatar.read()
-        user.avatar = avatar_bytes
-    db.commit()
-    db.refresh(user)
+        user.avatar_hash = await ingest_image(db, avatar_bytes, AVATAR_VARIANTS)
+        await touch_author(db, user.id)
+    await db.commit()
+    await db.refresh(user)
+    await invalidate_user_avatar(user.id)
     return {"message": f"User {user.id} updated"}
 
 
@@ -204,10 +212,14 @@ async def user_delete(
 ):
     if current_user.get("role") != "admin" and current_user.get("id") != user_id:
         raise HTTPError(403, "Insufficient permissions")
-    user = get_user(db=db,id=user_id)
+    user = await get_user(db=db,id=user_id)
     if not user:
         raise HTTPError(404, "User does not exist")
-    db.delete(user)
-    db.commit()
+    await drop_user_entries(db, user_id)
+    await touch_author(db, user_id)
+    await db.delete(user)
+    await db.commit()
+    await invalidate_user_avatar(user_id)
+    await invalidate_membership(user_id)
     return {"message": "User deleted"}
     
@@ -0,0 +1,55 @@
+import os
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import Cache
+from app.dbmodels import User, Post
+from app.storage import media_url
+from app.schemas import UserCard
+
+
+AVATAR_CACHE_TTL = float(os.getenv("AVATAR_CACHE_TTL", "300"))
+
+# user id -> (username, avatar hash), the author cards of feeds and comment
+# pages. An avatar change invalidates the user's entry; with a shared cache
+# backend that reaches every worker, with the in-process one the TTL bounds
+# how long another worker shows the old avatar.
+# Avatar URLs are built from the hash on the spot, there is nothing to cache
+# for a row already at hand.
+avatar_cache = Cache("avatars", AVATAR_CACHE_TTL)
+
+
+async def invalidate_user_avatar(user_id: int):
+    await avatar_cache.invalidate(user_id)
+
+
+async def warm_avatar_cache(db: AsyncSession, limit: int = 1000):
+    # Authors of the newest posts are the ones the first feed pages show.
+    # The newest `limit` posts are read backwards along the primary key, so
+    # boot time does not grow with the posts table.
+    recent = select(Post.user_id).order_by(Post.id.desc()).limit(limit)
+    await user_cards(db, (await db.scalars(recent)).all())
+
+
+async def user_cards(db: AsyncSession, user_ids, variant: Optional[str] = None, cached: bool = True):
+    # A UserCard for every author on a page. Cached authors come back in one
+    # cache round trip; the rest are fetched together in one narrow query.
+    # Bulk reads pass cached=False, walking every author would push the hot
+    # ones out of the cache.
+    user_ids = set(user_ids)
+    cards = await avatar_cache.get_many(user_ids) if cached else {}
+    missing = [user_id for user_id in user_ids if user_id not in cards]
+
+    if missing:
+        rows = (await db.execute(
+            select(User.id, User.username, User.avatar_hash).where(User.id.in_(missing))
+        )).all()
+        fetched = {user_id: (username, avatar_hash) for user_id, username, avatar_hash in rows}
+        if cached:
+            await avatar_cache.put_many(fetched)
+        cards.update(fetched)
+
+    return {
+        user_id: UserCard(id=user_id, username=username, avatar=media_url(avatar_hash, variant))
+        for user_id, (username, avatar_hash) in cards.items()
+    }
@@ -0,0 +1,382 @@
+import asyncio
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+import aiosqlite
+from app import metrics
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:
+    # Only needed with CACHE_BACKEND=redis
+    redis = None
+
+
+# Shared caches. Each Cache is a namespace (one per kind of entry) on one
+# backend, chosen by settings:
+#   memory  an LRU in this process, bounded by the size of the stored values
+#   sqlite  a cache file shared by every worker on the host
+#   redis   a Redis server (or anything speaking its protocol), shared by
+#           every worker on every host
+# With a shared backend a delete or clear is seen by all workers at once, so
+# invalidation needs no broadcast of its own, and every worker fills the
+# cache for the others. Values are pickled, only point shared backends at
+# stores this app alone writes to.
+# Every backend call is a coroutine: the shared backends do their I/O off
+# the event loop (aiosqlite's thread, redis.asyncio), so a slow cache never
+# stalls other requests.
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# A cache that can't be reached behaves like an empty one instead of failing
+# the request; TTLs bound what a lost invalidation can leave behind.
+BACKEND_ERRORS = (OSError, sqlite3.Error) + ((redis.RedisError,) if redis else ())
+
+
+def pack(value, ttl: float) -> bytes:
+    return struct.pack(">d", time.time() + ttl) + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+def unpack(raw: Optional[bytes]):
+    # None when missing or expired
+    if raw is None or struct.unpack(">d", raw[:8])[0] < time.time():
+        return None
+    return pickle.loads(raw[8:])
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        with self.lock:
+            raw = self.entries.get((namespace, key))
+            if raw is not None:
+                self.entries.move_to_end((namespace, key))
+            return raw
+
+    async def get_many(self, namespace: str, keys: list) -> list:
+        return [await self.get(namespace, key) for key in keys]
+
+    async def set(self, namespace: str, key: str, raw: bytes, ttl: float):
+        if len(raw) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop((namespace, key), None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[(namespace, key)] = raw
+            self.size += len(raw)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    async def set_many(self, namespace: str, items: dict, ttl: float):
+        for key, raw in items.items():
+            await self.set(namespace, key, raw, ttl)
+
+    async def delete(self, namespace: str, key: str):
+        with self.lock:
+            old = self.entries.pop((namespace, key), None)
+            if old is not None:
+                self.size -= len(old)
+
+    async def clear(self, namespace: str):
+        with self.lock:
+            for entry in [entry for entry in self.entries if entry[0] == namespace]:
+                self.size -= len(self.entries.pop(entry))
+
+    async def close(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    async def stats(self):
+        with self.lock:
+            return {"backend": self.name, "entries": len(self.entries), "bytes": self.size, "max_bytes": self.max_bytes}
+
+
+class SQLiteBackend:
+    # One small table in its own file, WAL mode lets every worker read while
+    # one writes. Connections are opened per process, after any fork;
+    # aiosqlite runs the queries on the connection's own thread.
+    name = "sqlite"
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = asyncio.Lock()
+        self.conn = None
+        self.pid = None
+        self.writes = 0
+
+    async def connection(self):
+        if self.conn is None or self.pid != os.getpid():
+            async with self.lock:
+                if self.conn is None or self.pid != os.getpid():
+                    conn = await aiosqlite.connect(self.path, timeout=5, isolation_level=None)
+                    await conn.execute("PRAGMA journal_mode=WAL")
+                    await conn.execute("PRAGMA synchronous=NORMAL")
+                    await conn.execute(
+                        "CREATE TABLE IF NOT EXISTS cache_entries ("
+                        "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                        "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+                    )
+                    self.conn, self.pid = conn, os.getpid()
+        return self.conn
+
+    async def fetchone(self, sql: str, parameters: tuple = ()):
+        async with (await self.connection()).execute(sql, parameters) as cursor:
+            return await cursor.fetchone()
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        row = await self.fetchone("SELECT value FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+        return row[0] if row else None
+
+    async def get_many(self, namespace: str, keys: list) -> list:
+        placeholders = ", ".join("?" * len(keys))
+        async with (await self.connection()).execute(
+            f"SELECT key, value FROM cache_entries WHERE namespace = ? AND key IN ({placeholders})", (namespace, *keys)
+        ) as cursor:
+            found = dict(await cursor.fetchall())
+        return [found.get(key) for key in keys]
+
+    async def set(self, namespace: str, key: str, raw: bytes, ttl: float):
+        await self.set_many(namespace, {key: raw}, ttl)
+
+    async def set_many(self, namespace: str, items: dict, ttl: float):
+        conn = await self.connection()
+        await conn.executemany(
+            "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)", [(namespace, key, raw) for key, raw in items.items()]
+        )
+        previous, self.writes = self.writes, self.writes + len(items)
+        if previous // self.PRUNE_EVERY != self.writes // self.PRUNE_EVERY:
+            await self.prune(conn)
+
+    async def prune(self, conn):
+        # Expired entries first, then the ones closest to expiring until the
+        # file is back under max_bytes. The expiry is the value's first 8 bytes.
+        await conn.execute("DELETE FROM cache_entries WHERE substr(value, 1, 8) < ?", (struct.pack(">d", time.time()),))
+        size = (await self.fetchone("SELECT coalesce(sum(length(value)), 0) FROM cache_entries"))[0]
+        if size > self.max_bytes:
+            await conn.execute(
+                "DELETE FROM cache_entries WHERE (namespace, key) IN ("
+                " SELECT namespace, key FROM cache_entries ORDER BY substr(value, 1, 8)"
+                " LIMIT (SELECT count(*) / 4 + 1 FROM cache_entries))"
+            )
+
+    async def delete(self, namespace: str, key: str):
+        await (await self.connection()).execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    async def clear(self, namespace: str):
+        await (await self.connection()).execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+
+    async def close(self):
+        if self.conn is not None and self.pid == os.getpid():
+            await self.conn.close()
+        self.conn = None
+
+    async def stats(self):
+        entries, size = await self.fetchone("SELECT count(*), coalesce(sum(length(value)), 0) FROM cache_entries")
+        return {"backend": self.name, "path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class RedisBackend:
+    # A key per entry, set with its TTL, so Redis expires each one on its
+    # own and memory stays bounded by the server's maxmemory. Clearing a
+    # namespace scans for its keys; only rare writes (group changes) do
+    # that, lookups are a single GET.
+    name = "redis"
+    SCAN_COUNT = 1000
+
+    def __init__(self, url: str, prefix: str = "cache:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package")
+        self.url = url
+        self.prefix = prefix
+        self.client = None
+        self.pid = None
+
+    def connection(self):
+        if self.client is None or self.pid != os.getpid():
+            self.client = redis.asyncio.Redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self.pid = os.getpid()
+        return self.client
+
+    def key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return await self.connection().get(self.key(namespace, key))
+
+    async def get_many(self, namespace: str, keys: list) -> list:
+        return await self.connection().mget([self.key(namespace, key) for key in keys])
+
+    async def set(self, namespace: str, key: str, raw: bytes, ttl: float):
+        await self.connection().set(self.key(namespace, key), raw, px=max(1, int(ttl * 1000)))
+
+    async def set_many(self, namespace: str, items: dict, ttl: float):
+        async with self.connection().pipeline(transaction=False) as pipe:
+            for key, raw in items.items():
+                pipe.set(self.key(namespace, key), raw, px=max(1, int(ttl * 1000)))
+            await pipe.execute()
+
+    async def delete(self, namespace: str, key: str):
+        await self.connection().delete(self.key(namespace, key))
+
+    async def clear(self, namespace: str):
+        client = self.connection()
+        batch = []
+        async for name in client.scan_iter(match=self.key(namespace, "*"), count=self.SCAN_COUNT):
+            batch.append(name)
+            if len(batch) >= self.SCAN_COUNT:
+                await client.unlink(*batch)
+                batch = []
+        if batch:
+            await client.unlink(*batch)
+
+    async def close(self):
+        if self.client is not None and self.pid == os.getpid():
+            await self.client.aclose()
+        self.client = None
+
+    async def stats(self):
+        return {"backend": self.name, "keys": await self.connection().dbsize()}
+
+
+backend = MemoryBackend(CACHE_MAX_BYTES)
+namespaces = {}
+
+
+def configure_cache(settings):
+    # Once per lifespan, close_cache() closes the backend on shutdown
+    global backend
+    if settings.cache_backend == "memory":
+        backend = MemoryBackend(settings.cache_max_bytes)
+    elif settings.cache_backend == "sqlite":
+        backend = SQLiteBackend(settings.cache_url or "./cache.db", settings.cache_max_bytes)
+    elif settings.cache_backend == "redis":
+        backend = RedisBackend(settings.cache_url or "redis://localhost:6379/0")
+    else:
+        raise ValueError(f"Unknown cache backend {settings.cache_backend!r}")
+
+async def close_cache():
+    await backend.close()
+
+
+class Cache:
+    # A namespace on the configured backend. Hit and miss counts are kept
+    # per namespace, for this process.
+
+    def __init__(self, namespace: str, ttl: float):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+        self.hit_metric = metrics.cache_lookups.labels(namespace, "hit")
+        self.miss_metric = metrics.cache_lookups.labels(namespace, "miss")
+        self.error_metric = metrics.cache_lookups.labels(namespace, "error")
+        namespaces[namespace] = self
+
+    async def get(self, key):
+        try:
+            value = unpack(await backend.get(self.namespace, repr(key)))
+        except BACKEND_ERRORS:
+            self.errors += 1
+            self.error_metric.inc()
+            value = None
+        if value is None:
+            self.misses += 1
+            self.miss_metric.inc()
+        else:
+            self.hits += 1
+            self.hit_metric.inc()
+        return value
+
+    async def get_many(self, keys) -> dict:
+        # {key: value} for the keys found, in one backend round trip
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            raws = await backend.get_many(self.namespace, [repr(key) for key in keys])
+        except BACKEND_ERRORS:
+            self.errors += 1
+            self.error_metric.inc()
+            raws = [None] * len(keys)
+        found = {}
+        for key, raw in zip(keys, raws):
+            value = unpack(raw)
+            if value is not None:
+                found[key] = value
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        self.hit_metric.inc(len(found))
+        self.miss_metric.inc(len(keys) - len(found))
+        return found
+
+    async def put(self, key, value):
+        try:
+            await backend.set(self.namespace, repr(key), pack(value, self.ttl), self.ttl)
+        except BACKEND_ERRORS:
+            self.errors += 1
+        return value
+
+    async def put_many(self, items: dict):
+        if not items:
+            return
+        try:
+            await backend.set_many(
+                self.namespace, {repr(key): pack(value, self.ttl) for key, value in items.items()}, self.ttl
+            )
+        except BACKEND_ERRORS:
+            self.errors += 1
+
+    async def invalidate(self, key):
+        self.invalidations += 1
+        try:
+            await backend.delete(self.namespace, repr(key))
+        except BACKEND_ERRORS:
+            self.errors += 1
+
+    async def clear(self):
+        self.invalidations += 1
+        try:
+            await backend.clear(self.namespace)
+        except BACKEND_ERRORS:
+            self.errors += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": backend.name,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "invalidations": self.invalidations,
+            "errors": self.errors
+        }
+
+
+async def cache_stats():
+    try:
+        backend_stats = await backend.stats()
+    except BACKEND_ERRORS as error:
+        backend_stats = {"backend": backend.name, "error": str(error)}
+    return {
+        "backend": backend_stats,
+        "namespaces": {name: cache.stats() for name, cache in namespaces.items()}
+    }
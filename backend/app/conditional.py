@@ -0,0 +1,66 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import select, update, func, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dbmodels import Group, Post, Comment, GroupMember, User
+
+
+# Conditional GET for polled JSON endpoints. The validator is built from row
+# versions (updated_at, counts) read with one small query, so an unchanged
+# resource is answered with 304 before the body is built or serialized.
+# "no-cache" makes browsers revalidate every time, fetch() then gets the
+# cached body back transparently on a 304.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    # A 304 response when the client already has this version
+    candidates = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+async def touch_feeds(db: AsyncSession, group_ids):
+    # Every write shown in a feed bumps its group's feed_version, in the
+    # same transaction. group_ids is a list or a select of ids. The group's
+    # own updated_at (its validator) stays put.
+    await db.execute(
+        update(Group)
+        .where(Group.id.in_(group_ids))
+        .values(feed_version=Group.feed_version + 1, updated_at=Group.updated_at)
+    )
+
+async def touch_post(db: AsyncSession, post_id: int):
+    await touch_feeds(db, select(Post.group_id).where(Post.id == post_id))
+
+async def touch_author(db: AsyncSession, user_id: int):
+    # The feeds showing the user's card: groups with their posts or comments
+    await touch_feeds(db, union(
+        select(Post.group_id).where(Post.user_id == user_id),
+        select(Post.group_id).join(Comment, Comment.post_id == Post.id).where(Comment.user_id == user_id),
+    ))
+
+
+async def feeds_version(db: AsyncSession, group_ids) -> int:
+    # Versions only grow, so for a given set of groups (part of the ETag)
+    # their sum changes on every write. One primary key lookup per group.
+    return await db.scalar(select(func.sum(Group.feed_version)).where(Group.id.in_(group_ids)))
+
+async def members_version(db: AsyncSession, group_id: int):
+    return (await db.execute(
+        select(func.count(), func.max(GroupMember.updated_at), func.max(User.updated_at))
+        .select_from(GroupMember)
+        .join(User, User.id == GroupMember.user_id)
+        .where(GroupMember.group_id == group_id)
+    )).one()
@@ -0,0 +1,138 @@
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import SessionLocal, init_db
+from app.dbmodels import Group, Post, Comment, Reaction, utcnow
+
+
+REACTION_TYPES = ("like", "dislike")
+
+COUNTER_COLUMNS = {
+    "like": "like_count",
+    "dislike": "dislike_count",
+}
+
+REACTION_TARGETS = {
+    Post: Reaction.post_id,
+    Comment: Reaction.comment_id,
+}
+
+
+async def bump_counter(db: AsyncSession, model, target_id: int, counter: str, delta: int):
+    # Done in SQL so concurrent requests can't overwrite each other's counts.
+    # The caller commits, together with the row change being counted.
+    column = getattr(model, counter)
+    await db.execute(
+        update(model)
+        .where(model.id == target_id)
+        .values({column: column + delta})
+    )
+
+async def bump_reaction_counter(db: AsyncSession, model, target_id: int, reaction_type: str, delta: int):
+    await bump_counter(db, model, target_id, COUNTER_COLUMNS[reaction_type], delta)
+
+
+async def toggle_reaction(db: AsyncSession, model, target_id: int, user_id: int, reaction_type: str):
+    # Clicking the current reaction removes it, clicking the other one
+    # switches. The delete returns what was there, so there is no read first;
+    # the unique (target, user) index keeps concurrent clicks from adding a
+    # second row. Returns the user's reaction and the target's new counts,
+    # the caller commits.
+    target_column = REACTION_TARGETS[model]
+    previous = (await db.execute(
+        delete(Reaction)
+        .where(target_column == target_id, Reaction.user_id == user_id)
+        .returning(Reaction.type)
+        .execution_options(synchronize_session=False)
+    )).scalars().all()
+
+    deltas = dict.fromkeys(REACTION_TYPES, 0)
+    for old_type in previous:
+        deltas[old_type] -= 1
+    my_reaction = None
+    if reaction_type not in previous:
+        added = (await db.execute(
+            sqlite_insert(Reaction)
+            .values({target_column.key: target_id, "user_id": user_id, "type": reaction_type, "created_at": utcnow()})
+            .on_conflict_do_nothing()
+            .returning(Reaction.id)
+        )).first()
+        if added:
+            deltas[reaction_type] += 1
+            my_reaction = reaction_type
+
+    counters = [getattr(model, COUNTER_COLUMNS[reaction]) for reaction in REACTION_TYPES]
+    values = {
+        getattr(model, COUNTER_COLUMNS[reaction]): getattr(model, COUNTER_COLUMNS[reaction]) + delta
+        for reaction, delta in deltas.items() if delta
+    }
+    if values:
+        counts = (await db.execute(
+            update(model)
+            .where(model.id == target_id)
+            .values(values)
+            .returning(*counters)
+            .execution_options(synchronize_session=False)
+        )).one()
+    else:
+        counts = (await db.execute(select(*counters).where(model.id == target_id))).one()
+    return my_reaction, dict(zip(counts._fields, counts))
+
+
+def dedupe_reactions(db: Session):
+    # Keeps the newest reaction per user and target, older databases could
+    # have several. Must run before the unique indexes can be created.
+    for target_column in REACTION_TARGETS.values():
+        newest = (
+            select(func.max(Reaction.id))
+            .where(target_column.is_not(None))
+            .group_by(target_column, Reaction.user_id)
+        )
+        db.execute(delete(Reaction).where(target_column.is_not(None), Reaction.id.not_in(newest)))
+    db.commit()
+    for index in Reaction.__table__.indexes:
+        index.create(db.get_bind(), checkfirst=True)
+
+
+def rebuild_counters(db: Session):
+    # Recount every post and comment from the reactions and comments tables
+    targets = (
+        (Post, Reaction.post_id),
+        (Comment, Reaction.comment_id),
+    )
+    for model, target_column in targets:
+        values = {}
+        for reaction_type, counter in COUNTER_COLUMNS.items():
+            values[counter] = (
+                select(func.count())
+                .select_from(Reaction)
+                .where(target_column == model.id, Reaction.type == reaction_type)
+                .scalar_subquery()
+            )
+        db.execute(update(model).values(values))
+
+    db.execute(update(Post).values(comment_count=(
+        select(func.count())
+        .select_from(Comment)
+        .where(Comment.post_id == Post.id)
+        .scalar_subquery()
+    )))
+    # Counts may have changed anywhere, so every feed's ETag goes stale
+    db.execute(update(Group).values(feed_version=Group.feed_version + 1, updated_at=Group.updated_at))
+    db.commit()
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        dedupe_reactions(db)
+        rebuild_counters(db)
+        print("Counters rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
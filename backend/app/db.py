@@ -1,19 +1,77 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import Depends
+from app.settings import Settings
 
 
-DB_URL = 'sqlite:///./testdbapp.db'
+# Engines are created by init_db(), from the app's lifespan or a command line
+# script's main(), never at import: a pre-forking server would otherwise hand
+# the same open connections to every worker.
+# The sync engine is used for migrations and command line scripts, request
+# handlers go through the async engine so queries don't block the event loop.
+engine: Optional[Engine] = None
+async_engine: Optional[AsyncEngine] = None
 
-engine = create_engine(DB_URL, connect_args={'check_same_thread':False})
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit, an expired attribute would need a lazy
+# load which the async session can't do implicitly.
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
 
+def pool_options(settings: Settings):
+    options = {
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.pool_timeout,
+    }
+    return {name: value for name, value in options.items() if value is not None}
+
+def enable_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys unless each connection asks for them. With
+    # them on, the ON DELETE CASCADE clauses delete what the ORM relationships
+    # don't cover, e.g. the reactions on a deleted comment; left behind, those
+    # would land on a later comment that reuses the rowid.
+    # Only the app's engines: migrations rebuild tables, and dropping one
+    # would then cascade into its children.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def init_db(settings: Optional[Settings] = None):
+    global engine, async_engine
+    if engine is not None:
+        if settings is not None and settings.db_url != engine.url.render_as_string(hide_password=False):
+            raise RuntimeError("The database is already initialized with another URL, call close_db() first")
+        return
+    settings = settings or Settings.from_env()
+    engine = create_engine(settings.db_url, connect_args={'check_same_thread':False}, **pool_options(settings))
+    async_engine = create_async_engine(settings.async_db_url, **pool_options(settings))
+    for sync_engine in (engine, async_engine.sync_engine):
+        if sync_engine.dialect.name == "sqlite":
+            event.listen(sync_engine, "connect", enable_foreign_keys)
+    SessionLocal.configure(bind=engine)
+    AsyncSessionLocal.configure(bind=async_engine)
+
+def get_engine() -> Engine:
+    init_db()
+    return engine
+
+async def close_db():
+    global engine, async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+    if engine is not None:
+        engine.dispose()
+    engine = async_engine = None
+
+
 
 def get_db():
     db = SessionLocal()
@@ -22,4 +80,9 @@ def get_db():
     finally:
         db.close()
 
-db_dependency = Annotated[Session, Depends(get_db)]
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+sync_db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
@@ -1,7 +1,12 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, LargeBinary, DateTime, Boolean, ForeignKey
+from sqlalchemy import String, Integer, DateTime, Boolean, ForeignKey, Index
 from app.db import Base
 from typing import List, Optional
+from datetime import datetime, timezone
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
 
 
 class User(Base):
@@ -11,10 +16,12 @@ class User(Base):
     username: Mapped[str] = mapped_column(String, unique=True, index=True)  
     hashed_password: Mapped[str] = mapped_column(String)
     email:Mapped[str] = mapped_column(String, unique=True, index=True)
-    avatar:Mapped[LargeBinary] = mapped_column(LargeBinary, nullable=True)
+    avatar_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     registration_date: Mapped[DateTime] = mapped_column(DateTime)
     role: Mapped[str] = mapped_column(String, default="user")
     status: Mapped[str] = mapped_column(String, default="active")
+    # Bumped on every row change (ORM or update()), used as a cache validator
+    updated_at: Mapped[Optional[DateTime]] = mapped_column(DateTime, nullable=True, default=utcnow, onupdate=utcnow)
 
     group_associations: Mapped[List["GroupMember"]] = relationship(back_populates="user", cascade="all, delete")
     posts: Mapped[List["Post"]] = relationship(back_populates="user", cascade="all, delete")
@@ -28,9 +35,16 @@ class Group(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, unique=True, index=True)  
     description: Mapped[str] = mapped_column(String)
-    avatar:Mapped[LargeBinary] = mapped_column(LargeBinary, nullable=True, default=None)
+    avatar_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, default=None)
     creation_date: Mapped[DateTime] = mapped_column(DateTime)
     public: Mapped[bool] = mapped_column(Boolean)
+    # Set once the group outgrows fan-out on write, its posts are then merged
+    # into home timelines at read time
+    fanout_on_read: Mapped[bool] = mapped_column(Boolean, default=False, server_default="0")
+    # Bumped on every change shown in the group's feed (posts, comments,
+    # reactions, their authors' avatars), see app/conditional.py
+    feed_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    updated_at: Mapped[Optional[DateTime]] = mapped_column(DateTime, nullable=True, default=utcnow, onupdate=utcnow)
 
     member_associations: Mapped[List["GroupMember"]] = relationship(back_populates="group", cascade="all, delete")
     posts: Mapped[List["Post"]] = relationship(back_populates="group", cascade="all, delete")
@@ -40,52 +54,105 @@ class Group(Base):
 class GroupMember(Base):
     __tablename__ = "groupmembers"
 
-    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     role: Mapped[str] = mapped_column(String, default="user")
+    updated_at: Mapped[Optional[DateTime]] = mapped_column(DateTime, nullable=True, default=utcnow, onupdate=utcnow)
 
     user: Mapped["User"] = relationship(back_populates="group_associations")
     group: Mapped["Group"] = relationship(back_populates="member_associations")
 
+    __table_args__ = (
+        # The primary key serves lookups by group, this one a user's groups
+        Index("ix_groupmembers_user_group", "user_id", "group_id"),
+    )
+
 
 
 class Post(Base):
     __tablename__ = 'posts'
 
     id:Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    group_id: Mapped[int] = mapped_column(ForeignKey('groups.id', ondelete='CASCADE'), index=True)
-    user_id:  Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), index=True)
+    group_id: Mapped[int] = mapped_column(ForeignKey('groups.id', ondelete='CASCADE'))
+    user_id:  Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
     content: Mapped[str] = mapped_column(String)
-    image: Mapped[LargeBinary] = mapped_column(LargeBinary, nullable=True)
+    image_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime)
+    like_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    dislike_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    comment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    updated_at: Mapped[Optional[DateTime]] = mapped_column(DateTime, nullable=True, default=utcnow, onupdate=utcnow)
 
     user: Mapped["User"] = relationship(back_populates="posts")
     comments: Mapped[List["Comment"]] = relationship(back_populates="post", cascade="all, delete")
     reactions: Mapped[List["Reaction"]] = relationship(back_populates="post", cascade="all, delete")
     group: Mapped["Group"] = relationship(back_populates="posts")
 
+    __table_args__ = (
+        # Feed pages, newest first. SQLite appends the rowid (id) to every
+        # index, so these also cover the "created_at, id" tie-break.
+        Index("ix_posts_group_created", "group_id", "created_at"),
+        Index("ix_posts_user_created", "user_id", "created_at"),
+    )
+
 
 class Comment(Base):
     __tablename__ = "comments"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    post_id: Mapped[int] = mapped_column(ForeignKey('posts.id', ondelete='CASCADE'), index=True)
+    post_id: Mapped[int] = mapped_column(ForeignKey('posts.id', ondelete='CASCADE'))
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), index=True)
     text: Mapped[str] = mapped_column(String)
     created_at: Mapped[DateTime] = mapped_column(DateTime)
+    like_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    dislike_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     post: Mapped["Post"] = relationship(back_populates="comments")
     user: Mapped["User"] = relationship(back_populates="comments")
 
+    __table_args__ = (
+        # Comment pages and previews, newest first per post
+        Index("ix_comments_post_created", "post_id", "created_at"),
+    )
+
 class Reaction(Base):
     __tablename__ = "reactions"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id", ondelete="CASCADE"), index=True)
+    post_id: Mapped[Optional[int]] = mapped_column(ForeignKey("posts.id", ondelete="CASCADE"), nullable=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
-    comment_id: Mapped[Optional[int]] = mapped_column(ForeignKey("comments.id", ondelete="CASCADE"), index=True, nullable=True)
+    comment_id: Mapped[Optional[int]] = mapped_column(ForeignKey("comments.id", ondelete="CASCADE"), nullable=True)
     type: Mapped[str] = mapped_column(String)  
     created_at: Mapped[DateTime] = mapped_column(DateTime)
 
     post: Mapped["Post"] = relationship(back_populates="reactions")
-    user: Mapped["User"] = relationship()    
\ No newline at end of file
+    user: Mapped["User"] = relationship()
+
+    __table_args__ = (
+        # One reaction per user and target. NULLs are distinct, so post and
+        # comment reactions don't collide. They also serve lookups by target.
+        Index("uq_reactions_post_user", "post_id", "user_id", unique=True),
+        Index("uq_reactions_comment_user", "comment_id", "user_id", unique=True),
+    )
+
+
+class MediaVariant(Base):
+    __tablename__ = "media_variants"
+
+    source_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    variant: Mapped[str] = mapped_column(String, primary_key=True)
+    blob_hash: Mapped[str] = mapped_column(String(64))
+
+
+class TimelineEntry(Base):
+    __tablename__ = "timeline_entries"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True, index=True)
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), index=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime)
+
+    __table_args__ = (
+        # A home feed page is one range scan of this index
+        Index("ix_timeline_entries_user_created", "user_id", "created_at", "post_id"),
+    )
@@ -0,0 +1,253 @@
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, union, func, desc, and_, or_
+from datetime import datetime
+from typing import Optional
+import os
+from app.dbmodels import Group, Post, Comment, Reaction, TimelineEntry
+from app.api.user import HTTPError
+from app.storage import media_url
+from app.avatars import user_cards
+from app.schemas import FeedPostOut, CommentOut, UNKNOWN_USER
+import base64
+
+
+# Everything a feed page needs is fetched with one IN-list query per relation,
+# so a page costs the same fixed number of queries whatever its size. Authors
+# come from the avatar cache and only uncached ones are queried. Reactions are
+# not loaded at all: posts and comments carry their counters and only the
+# viewer's own reactions are looked up. Posts embed only their latest
+# comments, the rest are paged through /posts/{post_id}/comments.
+COMMENT_PREVIEW_COUNT = int(os.getenv("COMMENT_PREVIEW_COUNT", "3"))
+
+
+def serialize_comment(comment, authors: dict, my_reactions: Optional[dict] = None):
+    return CommentOut(
+        id=comment.id,
+        post_id=comment.post_id,
+        user_id=comment.user_id,
+        text=comment.text,
+        created_at=comment.created_at,
+        like_count=comment.like_count,
+        dislike_count=comment.dislike_count,
+        my_reaction=(my_reactions or {}).get(comment.id),
+        user=authors.get(comment.user_id)
+    )
+
+def serialize_post(post, authors: dict, image_variant: str = "preview", schema=FeedPostOut):
+    return schema(
+        id=post.id,
+        group_id=post.group_id,
+        user_id=post.user_id,
+        content=post.content,
+        image=media_url(post.image_hash, image_variant),
+        created_at=post.created_at,
+        like_count=post.like_count,
+        dislike_count=post.dislike_count,
+        comment_count=post.comment_count,
+        user=authors.get(post.user_id) or UNKNOWN_USER
+    )
+
+async def post_authors(db: AsyncSession, posts, cached: bool = True):
+    return await user_cards(db, [post.user_id for post in posts], "avatar_96", cached)
+
+async def comment_authors(db: AsyncSession, comments):
+    return await user_cards(db, [comment.user_id for comment in comments], "avatar_48")
+
+async def viewer_reactions(db: AsyncSession, viewer_id: int, target_column, target_ids):
+    # {target id: reaction type} for the viewer's own reactions
+    if not target_ids:
+        return {}
+    rows = (await db.execute(
+        select(target_column, Reaction.type)
+        .where(Reaction.user_id == viewer_id, target_column.in_(target_ids))
+    )).all()
+    return {target_id: reaction_type for target_id, reaction_type in rows}
+
+async def latest_comments(db: AsyncSession, post_ids, limit: int = COMMENT_PREVIEW_COUNT):
+    # {post id: its newest `limit` comments, oldest first} in a single query
+    if not post_ids or limit <= 0:
+        return {}
+    ranked = select(
+        Comment,
+        func.row_number().over(
+            partition_by=Comment.post_id,
+            order_by=(desc(Comment.created_at), desc(Comment.id))
+        ).label('rank')
+    ).where(Comment.post_id.in_(post_ids)).subquery()
+    latest = aliased(Comment, ranked)
+    stmt = (
+        select(latest)
+        .where(ranked.c.rank <= limit)
+        .order_by(latest.created_at, latest.id)
+    )
+
+    comments_by_post = {}
+    for comment in (await db.scalars(stmt)).all():
+        comments_by_post.setdefault(comment.post_id, []).append(comment)
+    return comments_by_post
+
+async def assemble_posts(db: AsyncSession, posts, viewer_id: int, image_variant: str = "preview"):
+    comments_by_post = await latest_comments(db, [post.id for post in posts])
+    comments = [comment for post_comments in comments_by_post.values() for comment in post_comments]
+    authors = await post_authors(db, posts)
+    commenters = await comment_authors(db, comments)
+    my_post_reactions = await viewer_reactions(db, viewer_id, Reaction.post_id, [post.id for post in posts])
+    my_comment_reactions = await viewer_reactions(db, viewer_id, Reaction.comment_id, [comment.id for comment in comments])
+
+    posts_list = []
+    for post in posts:
+        post_out = serialize_post(post, authors, image_variant)
+        post_out.my_reaction = my_post_reactions.get(post.id)
+        post_out.comments = [
+            serialize_comment(comment, commenters, my_comment_reactions)
+            for comment in comments_by_post.get(post.id, [])
+        ]
+        posts_list.append(post_out)
+    return posts_list
+
+
+def encode_cursor(row):
+    # Works for anything ordered by (created_at, id): posts and comments
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('utf-8')
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8')
+        created_at, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPError(400, "Invalid cursor")
+
+async def paginate_feed(
+    db: AsyncSession,
+    *filters,
+    viewer_id: int,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True
+):
+    # Cursor mode walks the (created_at, id) order from the last post seen,
+    # so deep pages cost the same as the first one. Page mode is kept for
+    # clients that still ask for page numbers.
+    stmt = select(Post).where(*filters).order_by(desc(Post.created_at), desc(Post.id))
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Post.created_at < created_at,
+            and_(Post.created_at == created_at, Post.id < post_id)
+        ))
+    else:
+        stmt = stmt.offset((page - 1) * per_page)
+
+    # One extra row tells us whether there is a next page without counting
+    posts = (await db.scalars(stmt.limit(per_page + 1))).all()
+    has_more = len(posts) > per_page
+    posts = posts[:per_page]
+
+    total_count = None
+    total_pages = None
+    if include_total:
+        total_count = await db.scalar(select(func.count()).select_from(Post).where(*filters))
+        total_pages = (total_count + per_page - 1) // per_page
+
+    return {
+        "posts": await assemble_posts(db, posts, viewer_id),
+        "total": total_count,
+        "page": page,
+        "per_page": per_page,
+        "total_pages": total_pages,
+        "next_cursor": encode_cursor(posts[-1]) if has_more else None
+    }
+
+async def paginate_timeline(
+    db: AsyncSession,
+    user_id: int,
+    group_ids,
+    *,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True
+):
+    # Same response as paginate_feed, read from the user's timeline entries
+    # plus the posts of any fan-out-on-read groups they belong to
+    read_groups = (await db.scalars(
+        select(Group.id).where(Group.id.in_(group_ids), Group.fanout_on_read)
+    )).all()
+
+    keys = select(
+        TimelineEntry.post_id.label("id"),
+        TimelineEntry.created_at.label("created_at")
+    ).where(TimelineEntry.user_id == user_id)
+    if read_groups:
+        keys = union(keys, select(Post.id, Post.created_at).where(Post.group_id.in_(read_groups)))
+    keys = keys.subquery()
+
+    stmt = select(keys.c.id, keys.c.created_at).order_by(desc(keys.c.created_at), desc(keys.c.id))
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            keys.c.created_at < created_at,
+            and_(keys.c.created_at == created_at, keys.c.id < post_id)
+        ))
+    else:
+        stmt = stmt.offset((page - 1) * per_page)
+
+    rows = (await db.execute(stmt.limit(per_page + 1))).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    by_id = {
+        post.id: post
+        for post in (await db.scalars(select(Post).where(Post.id.in_([row.id for row in rows])))).all()
+    }
+    posts = [by_id[row.id] for row in rows if row.id in by_id]
+
+    total_count = None
+    total_pages = None
+    if include_total:
+        total_count = await db.scalar(select(func.count()).select_from(keys))
+        total_pages = (total_count + per_page - 1) // per_page
+
+    return {
+        "posts": await assemble_posts(db, posts, user_id),
+        "total": total_count,
+        "page": page,
+        "per_page": per_page,
+        "total_pages": total_pages,
+        "next_cursor": encode_cursor(rows[-1]) if has_more else None
+    }
+
+async def paginate_comments(
+    db: AsyncSession,
+    *filters,
+    viewer_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None
+):
+    # Newest first, walking back from the last comment seen
+    stmt = (
+        select(Comment)
+        .where(*filters)
+        .order_by(desc(Comment.created_at), desc(Comment.id))
+    )
+    if cursor:
+        created_at, comment_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Comment.created_at < created_at,
+            and_(Comment.created_at == created_at, Comment.id < comment_id)
+        ))
+
+    comments = (await db.scalars(stmt.limit(limit + 1))).all()
+    has_more = len(comments) > limit
+    comments = comments[:limit]
+
+    commenters = await comment_authors(db, comments)
+    my_reactions = await viewer_reactions(db, viewer_id, Reaction.comment_id, [comment.id for comment in comments])
+    return {
+        "comments": [serialize_comment(comment, commenters, my_reactions) for comment in comments],
+        "next_cursor": encode_cursor(comments[-1]) if has_more else None
+    }
@@ -0,0 +1,127 @@
+import asyncio
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.dbmodels import MediaVariant
+from app.storage import store_blob
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    # Without Pillow uploads are stored as-is and only the original is served
+    Image = None
+
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_QUEUE_LIMIT = int(os.getenv("IMAGE_QUEUE_LIMIT", "16"))
+
+# name -> (max width, max height, crop to square)
+VARIANTS = {
+    "avatar_48": (48, 48, True),
+    "avatar_96": (96, 96, True),
+    "preview": (640, 640, False),
+    "full": (1600, 1600, False),
+}
+
+AVATAR_VARIANTS = ("avatar_48", "avatar_96")
+POST_VARIANTS = ("preview", "full")
+
+# Upload kinds in the metrics
+UPLOAD_KINDS = {AVATAR_VARIANTS: "avatar", POST_VARIANTS: "post"}
+
+VARIANT_FORMAT = "WEBP"
+VARIANT_QUALITY = 80
+
+logger = logging.getLogger(__name__)
+
+
+def render_variants(data: bytes, names: tuple):
+    # Runs in a worker process: decode once, then resize and re-encode every
+    # requested variant.
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    results = {}
+    for name in names:
+        width, height, crop = VARIANTS[name]
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        resized.save(out, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4)
+        results[name] = out.getvalue()
+    return results
+
+
+def store_upload(data: bytes, names: tuple):
+    # Runs in a worker process: store the original and its variants, so the
+    # file writes stay off the event loop along with the resizing. Returns
+    # (original hash, {variant name: hash}); without variants when the image
+    # could not be decoded, the original is still served then.
+    blob_hash = store_blob(data)
+    if Image is None:
+        return blob_hash, {}
+    try:
+        variants = render_variants(data, names)
+    except Exception:
+        logger.exception("Could not create image variants for %s", blob_hash)
+        return blob_hash, {}
+    return blob_hash, {name: store_blob(variant_data) for name, variant_data in variants.items()}
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+image_jobs_pending = 0
+image_jobs_rejected = 0
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def run_in_pool(func, *args):
+    global image_jobs_pending, image_jobs_rejected
+    # Cap the number of images queued for the pool and reject the rest
+    # straight away, like the password pool: an upload burst gets fast 503s
+    # instead of piling up unbounded work and memory.
+    if image_jobs_pending >= IMAGE_QUEUE_LIMIT:
+        image_jobs_rejected += 1
+        metrics.image_jobs_rejected.inc()
+        raise HTTPException(status_code=503, detail="Server is busy, try again later", headers={"Retry-After": "1"})
+    image_jobs_pending += 1
+    metrics.image_jobs_pending.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_pool(), func, *args)
+    finally:
+        image_jobs_pending -= 1
+        metrics.image_jobs_pending.dec()
+
+
+async def ingest_image(db: AsyncSession, data: Optional[bytes], names: tuple) -> Optional[str]:
+    # Store the upload and its resized variants, returning the original's hash
+    if not data:
+        return None
+    blob_hash, variants = await run_in_pool(store_upload, data, names)
+    kind = UPLOAD_KINDS.get(names, "other")
+    metrics.uploads.labels(kind).inc()
+    metrics.upload_bytes.labels(kind).inc(len(data))
+
+    for name, variant_hash in variants.items():
+        await db.merge(MediaVariant(source_hash=blob_hash, variant=name, blob_hash=variant_hash))
+    return blob_hash
@@ -0,0 +1,207 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from app import db, metrics
+
+
+# Per-request accounting: engine events add every SQL statement run while a
+# request is being served to that request's RequestStats, a session event the
+# rows its ORM queries return, and the middleware
+# reports them in a Server-Timing header and records them in the Prometheus
+# metrics, per route and per router (GET /metrics, GET /system/requests).
+# Queries run by a streamed body happen after the headers are sent, they are
+# in the histograms but not in the header.
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(HTTPException):
+    def __init__(self, budget: int):
+        super().__init__(500, f"Query budget exceeded: the budget is {budget} statements")
+
+
+class RequestStats:
+    # budget is only set when going over it must fail the request
+    __slots__ = ("started", "statements", "sql_time", "rows", "budget", "refused")
+
+    def __init__(self, budget: Optional[int] = None):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.budget = budget
+        self.refused = 0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        return (
+            f"app;dur={self.elapsed() * 1000:.2f}, "
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.statements} queries, {self.rows} rows"'
+        )
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None:
+        return
+    # Refused before it runs, so the request errors out and its transaction
+    # is rolled back instead of committed
+    if stats.budget is not None and stats.statements >= stats.budget:
+        stats.refused += 1
+        raise QueryBudgetExceeded(stats.budget)
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.sql_time += time.perf_counter() - conn.info["query_started"].pop()
+    stats.statements += 1
+
+def handle_error(context):
+    if current_request.get() is not None and context.connection is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+def do_orm_execute(state):
+    # The result is buffered to count its rows, the async session buffers it
+    # anyway. Streamed results (yield_per) are left as they are, their rows
+    # are counted batch by batch in app/streaming.py.
+    stats = current_request.get()
+    if stats is None or not state.is_select or "yield_per" in state.execution_options:
+        return None
+    frozen = state.invoke_statement().freeze()
+    stats.rows += len(frozen.data)
+    return frozen()
+
+def count_rows(count: int):
+    stats = current_request.get()
+    if stats is not None:
+        stats.rows += count
+
+def instrument_pool(pool, name: str):
+    # Pools other than QueuePool (e.g. for in-memory SQLite) have no size
+    # or overflow to report
+    if hasattr(pool, "overflow"):
+        metrics.db_pool_size.labels(name).set(pool.size())
+
+    def update(*args):
+        metrics.db_pool_checked_out.labels(name).set(pool.checkedout())
+        if hasattr(pool, "overflow"):
+            metrics.db_pool_overflow.labels(name).set(max(0, pool.overflow()))
+
+    event.listen(pool, "checkout", update)
+    event.listen(pool, "checkin", update)
+
+    # There is no event before a checkout, so time connect() itself: waiting
+    # for a free connection, or opening a new one
+    connect = pool.connect
+    wait = metrics.db_pool_wait.labels(name)
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        except PoolTimeout:
+            metrics.db_pool_timeouts.labels(name).inc()
+            raise
+        finally:
+            wait.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+def instrument_engine(engine, name: str):
+    if not event.contains(engine, "after_cursor_execute", after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(engine, "handle_error", handle_error)
+        instrument_pool(engine.pool, name)
+
+def instrument_db():
+    # After init_db(), the engines are created there
+    instrument_engine(db.engine, "sync")
+    instrument_engine(db.async_engine.sync_engine, "async")
+    # Every session, the async ones run on a sync Session too
+    if not event.contains(Session, "do_orm_execute", do_orm_execute):
+        event.listen(Session, "do_orm_execute", do_orm_execute)
+
+
+def route_name(scope) -> str:
+    # The path template, so /posts/1 and /posts/2 are one route; requests
+    # that matched nothing are pooled
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else '<unmatched>'}"
+
+def router_name(scope) -> str:
+    route = scope.get("route")
+    tags = getattr(route, "tags", None)
+    return tags[0] if tags else "none"
+
+
+class RequestMetrics:
+    # Plain ASGI middleware, so streamed responses pass through untouched.
+    # query_budget caps the statements a request may run, a debugging aid:
+    # "warn" logs the offending requests, "fail" also refuses the statements
+    # over the budget, failing the request with a 500 before it commits.
+
+    def __init__(self, app, server_timing: bool = True, query_budget: Optional[int] = None, budget_action: str = "warn"):
+        self.app = app
+        self.server_timing = server_timing
+        self.query_budget = query_budget
+        self.budget_action = budget_action
+
+    def check_budget(self, route: str, stats: RequestStats):
+        statements = stats.statements + stats.refused
+        if self.query_budget is not None and statements > self.query_budget:
+            logger.warning(
+                "%s ran %d SQL statements, over the budget of %d%s", route, statements, self.query_budget,
+                f", refused {stats.refused}" if stats.refused else ""
+            )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(self.query_budget if self.budget_action == "fail" else None)
+        token = current_request.set(stats)
+        status = 500
+        size = 0
+        metrics.requests_in_flight.inc()
+
+        async def send_with_timing(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            metrics.requests_in_flight.dec()
+            elapsed = stats.elapsed()
+            router, route = router_name(scope), route_name(scope)
+            self.check_budget(route, stats)
+            metrics.request_latency.labels(router, scope["method"]).observe(elapsed)
+            metrics.requests_total.labels(router, scope["method"], str(status)).inc()
+            metrics.response_size.labels(router).observe(size)
+            metrics.route_latency.labels(route).observe(elapsed)
+            metrics.request_statements.labels(route).observe(stats.statements)
+            metrics.request_sql_time.labels(route).observe(stats.sql_time)
+            metrics.request_rows.labels(route).observe(stats.rows)
@@ -1,28 +1,78 @@
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import user, group, post
-from app.db import Base, engine
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173"],  # Frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"]
-)
-
-# Include routers
-app.include_router(user.router)
-app.include_router(group.router)
-app.include_router(post.router)
-
-@app.get("/")
-async def root():
-    return {"message": "Welcome to the API"} 
\ No newline at end of file
+from app.api import user, group, post, media, system, metrics
+from app.api.auth import shutdown_password_executor
+from app.avatars import warm_avatar_cache
+from app.cache import configure_cache, close_cache
+from app.db import init_db, close_db, AsyncSessionLocal
+from app.images import shutdown_pool
+from app.instrumentation import RequestMetrics, instrument_db
+from app.metrics import worker_exit
+from app.settings import Settings
+
+
+# Importing this module opens nothing: engines and pools are created in the
+# lifespan, i.e. in each worker after a pre-forking server has forked.
+# The schema is managed with Alembic, run `alembic upgrade head` from the
+# backend directory before starting the app.
+#   uvicorn app.main:app --workers 4
+#   uvicorn app.main:create_app --factory
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = app.state.settings
+    init_db(settings)
+    instrument_db()
+    configure_cache(settings)
+    if settings.warmup:
+        async with AsyncSessionLocal() as db:
+            await warm_avatar_cache(db)
+    yield
+    shutdown_pool()
+    shutdown_password_executor()
+    await close_cache()
+    await close_db()
+    worker_exit()
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings.from_env()
+    app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+    app.state.settings = settings
+
+    app.include_router(user.router)
+    app.include_router(group.router)
+    app.include_router(post.router)
+    app.include_router(media.router)
+    app.include_router(system.router)
+    if settings.metrics:
+        app.include_router(metrics.router)
+
+    # Added first so it runs inside CORS, its responses get CORS headers too
+    app.add_middleware(
+        RequestMetrics,
+        server_timing=settings.server_timing,
+        query_budget=settings.query_budget,
+        budget_action=settings.query_budget_action,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["*"],
+        expose_headers=["*"],
+        max_age=3600,
+    )
+
+    @app.get("/")
+    async def root():
+        return {"message": "App is working"}
+
+    return app
+
+
+app = create_app()
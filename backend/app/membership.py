@@ -0,0 +1,37 @@
+import os
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import Cache
+from app.dbmodels import GroupMember
+
+
+MEMBERSHIP_CACHE_TTL = float(os.getenv("MEMBERSHIP_CACHE_TTL", "60"))
+
+# user id -> {group id: role}. Every membership change invalidates the user's
+# entry; with a shared cache backend that reaches every worker, with the
+# in-process one the TTL bounds how long another worker can miss it.
+membership_cache = Cache("memberships", MEMBERSHIP_CACHE_TTL)
+
+
+async def user_memberships(db: AsyncSession, user_id: int) -> dict:
+    # {group id: role} for every group the user belongs to
+    roles = await membership_cache.get(user_id)
+    if roles is None:
+        rows = (await db.execute(
+            select(GroupMember.group_id, GroupMember.role).where(GroupMember.user_id == user_id)
+        )).all()
+        roles = dict(rows)
+        await membership_cache.put(user_id, roles)
+    return roles
+
+async def group_role(db: AsyncSession, user_id: int, group_id: int) -> Optional[str]:
+    # The user's role in the group, None if not a member
+    return (await user_memberships(db, user_id)).get(group_id)
+
+async def invalidate_membership(user_id: int):
+    await membership_cache.invalidate(user_id)
+
+async def group_member_ids(db: AsyncSession, group_id: int):
+    # Read before a group is deleted, to invalidate its members afterwards
+    return (await db.scalars(select(GroupMember.user_id).where(GroupMember.group_id == group_id))).all()
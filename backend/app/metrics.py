@@ -0,0 +1,113 @@
+import os
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+
+# Prometheus metrics, served at GET /metrics. Everything is updated where it
+# happens rather than read at scrape time, so the numbers stay right with
+# several workers: set PROMETHEUS_MULTIPROC_DIR to an empty directory
+# shared by the workers and every scrape reports all of them. Gauges then
+# add up the live workers' values.
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000)
+
+# Requests, labelled by router tag (Users, Groups, Posts, ...; "none" when
+# no route matched)
+request_latency = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, body included",
+    ["router", "method"], buckets=LATENCY_BUCKETS
+)
+requests_total = Counter("http_requests", "Requests served", ["router", "method", "status"])
+requests_in_flight = Gauge("http_requests_in_flight", "Requests being served", multiprocess_mode="livesum")
+response_size = Histogram("http_response_size_bytes", "Response body sizes", ["router"], buckets=SIZE_BUCKETS)
+
+# Per route ("GET /posts/{post_id}"), from app/instrumentation.py, also
+# served as JSON at GET /system/requests
+route_latency = Histogram(
+    "http_route_duration_seconds", "Time to serve a request, per route", ["route"], buckets=LATENCY_BUCKETS
+)
+request_statements = Histogram(
+    "http_request_sql_statements", "SQL statements run per request", ["route"], buckets=STATEMENT_BUCKETS
+)
+request_sql_time = Histogram(
+    "http_request_sql_seconds", "Time spent in SQL per request", ["route"], buckets=LATENCY_BUCKETS
+)
+request_rows = Histogram(
+    "http_request_sql_rows", "Rows returned by ORM queries per request", ["route"], buckets=ROW_BUCKETS
+)
+ROUTE_HISTOGRAMS = {
+    "http_route_duration_seconds": "latency",
+    "http_request_sql_statements": "queries",
+    "http_request_sql_seconds": "sql_time",
+    "http_request_sql_rows": "rows",
+}
+
+# Connection pools, per engine ("async" serves requests, "sync" scripts)
+db_pool_size = Gauge("db_pool_size", "Connections the pool keeps open", ["engine"], multiprocess_mode="livesum")
+db_pool_checked_out = Gauge("db_pool_checked_out", "Connections in use", ["engine"], multiprocess_mode="livesum")
+db_pool_overflow = Gauge(
+    "db_pool_overflow", "Connections open beyond the pool size", ["engine"], multiprocess_mode="livesum"
+)
+db_pool_wait = Histogram(
+    "db_pool_checkout_seconds", "Time to get a connection from the pool", ["engine"], buckets=LATENCY_BUCKETS
+)
+db_pool_timeouts = Counter("db_pool_checkout_timeouts", "Checkouts that gave up after pool_timeout", ["engine"])
+
+# bcrypt runs on its own thread pool, see app/api/auth.py
+password_jobs_pending = Gauge(
+    "password_jobs_pending", "Password hashes queued or running", multiprocess_mode="livesum"
+)
+password_jobs_rejected = Counter("password_jobs_rejected", "Password jobs turned away with a 503")
+
+# Uploads are stored and resized on a process pool, see app/images.py
+image_jobs_pending = Gauge(
+    "image_jobs_pending", "Image uploads queued or being processed", multiprocess_mode="livesum"
+)
+image_jobs_rejected = Counter("image_jobs_rejected", "Image uploads turned away with a 503")
+
+# Uploaded images, by kind (avatar or post)
+upload_bytes = Counter("upload_bytes", "Bytes of uploaded images", ["kind"])
+uploads = Counter("uploads", "Uploaded images", ["kind"])
+
+# Caches, by namespace. result is hit, miss or error.
+cache_lookups = Counter("cache_lookups", "Cache lookups", ["namespace", "result"])
+
+
+def registry():
+    # Every worker's values in multiprocess mode, this process' otherwise
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render() -> bytes:
+    return generate_latest(registry())
+
+def route_stats():
+    # {route: {"latency": {"count", "sum", "buckets"}, "queries": ..., "sql_time": ..., "rows": ...}}
+    routes = {}
+    for family in registry().collect():
+        stat = ROUTE_HISTOGRAMS.get(family.name)
+        if stat is None:
+            continue
+        for sample in family.samples:
+            histogram = routes.setdefault(sample.labels["route"], {}).setdefault(
+                stat, {"count": 0, "sum": 0, "buckets": {}}
+            )
+            if sample.name.endswith("_bucket"):
+                histogram["buckets"][sample.labels["le"]] = sample.value
+            elif sample.name.endswith("_count"):
+                histogram["count"] = sample.value
+            elif sample.name.endswith("_sum"):
+                histogram["sum"] = sample.value
+    return dict(sorted(routes.items()))
+
+def worker_exit():
+    # Drops the live gauges of this worker from the shared directory
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,34 @@
+import os
+from fastapi import Request, Response
+from app.cache import Cache
+from app.conditional import CACHE_CONTROL, make_etag, not_modified
+
+
+GROUP_CACHE_TTL = float(os.getenv("GROUP_CACHE_TTL", "30"))
+
+# Rendered JSON bodies and their ETags keyed by endpoint and parameters.
+# Group writes clear the namespace; with the in-process backend the TTL
+# bounds how long a write made by another worker can go unnoticed.
+group_response_cache = Cache("group_responses", GROUP_CACHE_TTL)
+
+
+def cached_response(body: bytes, etag: str):
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+async def invalidate_group_responses():
+    await group_response_cache.clear()
+
+
+async def serve_cached(request: Request, cache: Cache, key: tuple, build):
+    # build() makes the response on a miss. Errors are raised as exceptions,
+    # so only successful responses are stored.
+    entry = await cache.get(key)
+    if entry is None:
+        response = await build()
+        entry = await cache.put(key, (response.body, response.headers.get("etag") or make_etag(response.body)))
+    body, etag = entry
+    return not_modified(request, etag) or cached_response(body, etag)
@@ -0,0 +1,98 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+from fastapi.responses import ORJSONResponse
+
+
+# Response shapes. Slotted dataclasses are cheap to build, only carry the
+# fields listed here (no ORM state, no lazy loads) and orjson serializes
+# them natively, so handlers returning them through respond() skip
+# FastAPI's generic jsonable_encoder walk.
+
+@dataclass(slots=True)
+class UserCard:
+    id: Optional[int]
+    username: str
+    avatar: Optional[str]
+
+UNKNOWN_USER = UserCard(id=None, username='Unknown User', avatar=None)
+
+
+@dataclass(slots=True)
+class UserOut:
+    id: int
+    username: str
+    email: str
+    registration_date: datetime
+    role: str
+    status: str
+    avatar: Optional[str]
+
+
+@dataclass(slots=True)
+class CommentOut:
+    id: int
+    post_id: int
+    user_id: int
+    text: str
+    created_at: datetime
+    like_count: int
+    dislike_count: int
+    my_reaction: Optional[str]
+    user: Optional[UserCard]
+
+
+@dataclass(slots=True)
+class PostOut:
+    id: int
+    group_id: int
+    user_id: int
+    content: str
+    image: Optional[str]
+    created_at: datetime
+    like_count: int
+    dislike_count: int
+    comment_count: int
+    user: UserCard
+
+@dataclass(slots=True)
+class FeedPostOut(PostOut):
+    # As the viewer sees it, with the latest comments
+    my_reaction: Optional[str] = None
+    comments: List[CommentOut] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class GroupOut:
+    id: int
+    name: str
+    description: str
+    creation_date: datetime
+    public: bool
+    avatar: Optional[str]
+
+@dataclass(slots=True)
+class GroupMatch(GroupOut):
+    is_member: bool = False
+    role: Optional[str] = None
+
+@dataclass(slots=True)
+class MyGroupOut:
+    id: int
+    name: str
+    description: str
+    avatar: Optional[str]
+    role: str
+
+@dataclass(slots=True)
+class GroupMemberOut:
+    id: int
+    username: str
+    email: str
+    avatar: Optional[str]
+    registration_date: datetime
+    role_in_group: str
+
+
+def respond(content, status_code: int = 200):
+    return ORJSONResponse(content, status_code=status_code)
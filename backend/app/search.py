@@ -0,0 +1,128 @@
+import os
+import re
+import base64
+from typing import Optional
+from sqlalchemy import select, func, text, table, column, literal_column, union_all
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_engine
+from app.dbmodels import Post, Comment
+from app.api.user import HTTPError
+from app.feed import assemble_posts
+from app.membership import user_memberships
+
+
+# FTS5 indexes over existing tables: index name -> (source table, columns).
+# They are external content tables, the text itself stays in the source
+# table and triggers keep the index in sync on every insert, update and
+# delete, whichever code path makes the change. Tables and triggers are
+# created by the migrations.
+SEARCH_INDEXES = {
+    "groups_fts": ("groups", ("name", "description")),
+    "posts_fts": ("posts", ("content",)),
+    "comments_fts": ("comments", ("text",)),
+}
+
+groups_fts = table("groups_fts", column("rowid"))
+posts_fts = table("posts_fts", column("rowid"))
+comments_fts = table("comments_fts", column("rowid"))
+
+# A post found through one of its comments ranks below one that matches
+# by its own content. bm25 scores are negative, lower is better.
+COMMENT_MATCH_WEIGHT = 0.5
+
+# Post search pages through at most this many results. Pages are offsets
+# into the ranking: bm25 scores shift as the index changes, so they make a
+# poor keyset, and the offset stays cheap while it is bounded.
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "200"))
+
+
+def rebuild_search_indexes(bind: Engine = None):
+    with (bind or get_engine()).begin() as conn:
+        for index in SEARCH_INDEXES:
+            conn.execute(text(f"INSERT INTO {index}({index}) VALUES ('rebuild')"))
+
+
+def match_query(terms: str) -> Optional[str]:
+    # Turn free text into an FTS5 query: every word must match, as a prefix,
+    # so "cat do" finds "Cats and dogs". Quoting keeps FTS5 syntax characters
+    # in user input from being interpreted.
+    words = re.findall(r"\w+", terms)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def encode_search_cursor(offset: int):
+    return base64.urlsafe_b64encode(str(offset).encode('utf-8')).decode('utf-8')
+
+def decode_search_cursor(cursor: str) -> int:
+    try:
+        offset = int(base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPError(400, "Invalid cursor")
+    if not 0 <= offset < SEARCH_MAX_RESULTS:
+        raise HTTPError(400, "Invalid cursor")
+    return offset
+
+
+async def search_posts(
+    db: AsyncSession,
+    terms: str,
+    *,
+    viewer_id: int,
+    group_id: Optional[int] = None,
+    limit: int = 10,
+    cursor: Optional[str] = None
+):
+    query = match_query(terms)
+    if not query:
+        return {"posts": [], "next_cursor": None}
+
+    # Only posts from groups the viewer belongs to. The groups are filtered
+    # next to each MATCH, so only visible hits are scored and ranked.
+    group_ids = list(await user_memberships(db, viewer_id))
+    if group_id is not None:
+        group_ids = [group_id] if group_id in group_ids else []
+    if not group_ids:
+        return {"posts": [], "next_cursor": None}
+
+    post_hits = (
+        select(Post.id.label("post_id"), literal_column("bm25(posts_fts)").label("score"))
+        .join(posts_fts, posts_fts.c.rowid == Post.id)
+        .where(text("posts_fts MATCH :post_query").bindparams(post_query=query), Post.group_id.in_(group_ids))
+    )
+    comment_hits = (
+        select(Comment.post_id, (literal_column("bm25(comments_fts)") * COMMENT_MATCH_WEIGHT).label("score"))
+        .join(comments_fts, comments_fts.c.rowid == Comment.id)
+        .join(Post, Post.id == Comment.post_id)
+        .where(text("comments_fts MATCH :comment_query").bindparams(comment_query=query), Post.group_id.in_(group_ids))
+    )
+    hits = union_all(post_hits, comment_hits).subquery()
+    ranking = (
+        select(hits.c.post_id)
+        .group_by(hits.c.post_id)
+        .order_by(func.min(hits.c.score), hits.c.post_id)
+    )
+
+    offset = decode_search_cursor(cursor) if cursor else 0
+    limit = min(limit, SEARCH_MAX_RESULTS - offset)
+    post_ids = (await db.scalars(ranking.offset(offset).limit(limit + 1))).all()
+    has_more = len(post_ids) > limit and offset + limit < SEARCH_MAX_RESULTS
+    post_ids = post_ids[:limit]
+
+    found = {post.id: post for post in (await db.scalars(select(Post).where(Post.id.in_(post_ids)))).all()}
+    posts = [found[post_id] for post_id in post_ids if post_id in found]
+    return {
+        "posts": await assemble_posts(db, posts, viewer_id),
+        "next_cursor": encode_search_cursor(offset + limit) if has_more else None
+    }
+
+
+def main():
+    rebuild_search_indexes()
+    print("Search indexes rebuilt")
+
+
+if __name__ == "__main__":
+    main()
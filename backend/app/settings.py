@@ -0,0 +1,61 @@
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+def env_list(name: str, default: str) -> List[str]:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+def env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+@dataclass(slots=True)
+class Settings:
+    db_url: str = "sqlite:///./testdbapp.db"
+    cors_origins: List[str] = field(default_factory=lambda: ["http://localhost:5173", "http://127.0.0.1:5173"])
+    # None keeps SQLAlchemy's defaults
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    pool_timeout: Optional[float] = None
+    # memory, sqlite or redis, see app/cache.py. cache_url is the cache file
+    # or the Redis URL.
+    cache_backend: str = "memory"
+    cache_url: Optional[str] = None
+    cache_max_bytes: int = 64 * 1024 * 1024
+    # Open a pooled connection and fill the caches at startup, so the first
+    # requests of a fresh worker don't pay for it
+    warmup: bool = True
+    # Server-Timing headers with the time spent in the app and in SQL
+    server_timing: bool = True
+    # Development aid: requests running more SQL statements than this are
+    # logged ("warn") or answered with a 500 ("fail"), see app/instrumentation.py
+    query_budget: Optional[int] = None
+    query_budget_action: str = "warn"
+    # Prometheus metrics at GET /metrics, see app/metrics.py
+    metrics: bool = True
+
+    @property
+    def async_db_url(self) -> str:
+        # Request handlers use the same database through aiosqlite
+        return self.db_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+    @classmethod
+    def from_env(cls):
+        defaults = cls()
+        return cls(
+            db_url=os.getenv("DATABASE_URL", defaults.db_url),
+            cors_origins=env_list("CORS_ORIGINS", ",".join(defaults.cors_origins)),
+            pool_size=env_int("DB_POOL_SIZE"),
+            max_overflow=env_int("DB_MAX_OVERFLOW"),
+            pool_timeout=env_int("DB_POOL_TIMEOUT"),
+            cache_backend=os.getenv("CACHE_BACKEND", defaults.cache_backend),
+            cache_url=os.getenv("CACHE_URL") or None,
+            cache_max_bytes=env_int("CACHE_MAX_BYTES") or defaults.cache_max_bytes,
+            warmup=os.getenv("STARTUP_WARMUP", "1") == "1",
+            server_timing=os.getenv("SERVER_TIMING", "1") == "1",
+            query_budget=env_int("QUERY_BUDGET"),
+            query_budget_action=os.getenv("QUERY_BUDGET_ACTION", defaults.query_budget_action),
+            metrics=os.getenv("METRICS", "1") == "1",
+        )
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+
+
+MEDIA_STORE = os.getenv("MEDIA_STORE", "local")
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "./media")
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "http://localhost:8000")
+
+
+class BlobStore(ABC):
+    # Blobs are addressed by the sha256 of their content, so the same upload
+    # is only stored once and a stored blob never changes.
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        ...
+
+    @abstractmethod
+    def exists(self, blob_hash: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, blob_hash: str) -> int:
+        ...
+
+    @abstractmethod
+    def open(self, blob_hash: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def delete(self, blob_hash: str):
+        ...
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, blob_hash: str):
+        # Shard by hash prefix to keep directories small
+        return os.path.join(self.root, blob_hash[:2], blob_hash[2:4], blob_hash)
+
+    def put(self, data: bytes) -> str:
+        blob_hash = hashlib.sha256(data).hexdigest()
+        path = self.path(blob_hash)
+        if os.path.exists(path):
+            return blob_hash
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except:
+            os.unlink(tmp_path)
+            raise
+        return blob_hash
+
+    def exists(self, blob_hash: str) -> bool:
+        return os.path.isfile(self.path(blob_hash))
+
+    def size(self, blob_hash: str) -> int:
+        return os.path.getsize(self.path(blob_hash))
+
+    def open(self, blob_hash: str) -> BinaryIO:
+        return open(self.path(blob_hash), "rb")
+
+    def delete(self, blob_hash: str):
+        try:
+            os.unlink(self.path(blob_hash))
+        except FileNotFoundError:
+            pass
+
+
+BLOB_STORES = {
+    "local": lambda: LocalBlobStore(MEDIA_ROOT),
+}
+
+_blob_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BLOB_STORES[MEDIA_STORE]()
+    return _blob_store
+
+def set_blob_store(store: BlobStore):
+    global _blob_store
+    _blob_store = store
+
+
+def is_blob_hash(value: str) -> bool:
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+def store_blob(data: Optional[bytes]) -> Optional[str]:
+    if not data:
+        return None
+    return get_blob_store().put(data)
+
+def media_url(blob_hash: Optional[str], variant: Optional[str] = None) -> Optional[str]:
+    if not blob_hash:
+        return None
+    if variant:
+        return f"{MEDIA_BASE_URL}/media/{blob_hash}?variant={variant}"
+    return f"{MEDIA_BASE_URL}/media/{blob_hash}"
+
+def sniff_content_type(head: bytes) -> str:
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
@@ -0,0 +1,27 @@
+import os
+import orjson
+from fastapi.responses import StreamingResponse
+from app.db import AsyncSessionLocal
+from app.instrumentation import count_rows
+
+
+# Bulk exports are streamed as NDJSON, one object per line, read from a
+# server-side cursor in batches of STREAM_BATCH_SIZE rows, so memory use
+# depends on the batch size and not on the size of the table.
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+
+async def stream_batches(stmt, batch_size: int = STREAM_BATCH_SIZE):
+    # Yields (session, rows) per batch. The request's session is closed
+    # before the body is sent, so the stream opens its own.
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            count_rows(len(rows))
+            yield db, rows
+
+def ndjson_response(items):
+    async def body():
+        async for item in items:
+            yield orjson.dumps(item) + b"\n"
+    return StreamingResponse(body(), media_type="application/x-ndjson")
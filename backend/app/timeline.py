@@ -0,0 +1,119 @@
+import os
+from sqlalchemy import select, insert, delete, update, func, or_, literal
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import SessionLocal, init_db
+from app.dbmodels import Group, GroupMember, Post, TimelineEntry
+
+
+# Fan-out on write: a new post is copied into the home timeline of every
+# member of its group, so reading the home feed is one range scan per user.
+# Groups with more than TIMELINE_FANOUT_MAX_MEMBERS members are switched to
+# fan-out on read for good, their posts are merged in when the feed is read.
+# Turn it on for an existing database after running `python -m app.timeline`.
+TIMELINE_FANOUT = os.getenv("TIMELINE_FANOUT", "0") == "1"
+TIMELINE_FANOUT_MAX_MEMBERS = int(os.getenv("TIMELINE_FANOUT_MAX_MEMBERS", "1000"))
+
+
+async def fan_out_post(db: AsyncSession, post: Post):
+    # Must run after the post is flushed, the caller commits
+    if not TIMELINE_FANOUT:
+        return
+    group = await db.get(Group, post.group_id)
+    if group.fanout_on_read:
+        return
+    member_count = await db.scalar(
+        select(func.count()).select_from(GroupMember).where(GroupMember.group_id == post.group_id)
+    )
+    if member_count > TIMELINE_FANOUT_MAX_MEMBERS:
+        group.fanout_on_read = True
+        return
+    await db.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "group_id", "created_at"],
+            select(GroupMember.user_id, literal(post.id), literal(post.group_id), literal(post.created_at))
+            .where(GroupMember.group_id == post.group_id)
+        )
+    )
+
+async def backfill_timeline(db: AsyncSession, user_id: int, group_id: int):
+    await backfill_timelines(db, [user_id], group_id)
+
+async def backfill_timelines(db: AsyncSession, user_ids, group_id: int):
+    # New members get the group's existing posts. Must run after their
+    # memberships are flushed.
+    group = await db.get(Group, group_id)
+    if not TIMELINE_FANOUT or not user_ids or group is None or group.fanout_on_read:
+        return
+    await db.flush()
+    await db.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "group_id", "created_at"],
+            select(GroupMember.user_id, Post.id, Post.group_id, Post.created_at)
+            .join(GroupMember, GroupMember.group_id == Post.group_id)
+            .where(Post.group_id == group_id, GroupMember.user_id.in_(user_ids))
+        )
+    )
+
+# Clean-up runs whether fan-out is on or not, so switching it on later
+# never finds stale entries. The caller commits.
+
+async def drop_membership_entries(db: AsyncSession, user_id: int, group_id: int):
+    await drop_members_entries(db, [user_id], group_id)
+
+async def drop_members_entries(db: AsyncSession, user_ids, group_id: int):
+    await db.execute(
+        delete(TimelineEntry)
+        .where(TimelineEntry.user_id.in_(user_ids), TimelineEntry.group_id == group_id)
+    )
+
+async def drop_post_entries(db: AsyncSession, post_id: int):
+    await db.execute(delete(TimelineEntry).where(TimelineEntry.post_id == post_id))
+
+async def drop_group_entries(db: AsyncSession, group_id: int):
+    await db.execute(delete(TimelineEntry).where(TimelineEntry.group_id == group_id))
+
+async def drop_user_entries(db: AsyncSession, user_id: int):
+    await db.execute(
+        delete(TimelineEntry)
+        .where(or_(
+            TimelineEntry.user_id == user_id,
+            TimelineEntry.post_id.in_(select(Post.id).where(Post.user_id == user_id))
+        ))
+    )
+
+
+def rebuild_timelines(db: Session):
+    # Refill every timeline from posts and memberships, e.g. before turning
+    # TIMELINE_FANOUT on for an existing database
+    db.execute(delete(TimelineEntry))
+    large_groups = (
+        select(GroupMember.group_id)
+        .group_by(GroupMember.group_id)
+        .having(func.count() > TIMELINE_FANOUT_MAX_MEMBERS)
+    )
+    db.execute(update(Group).where(Group.id.in_(large_groups)).values(fanout_on_read=True))
+    db.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "group_id", "created_at"],
+            select(GroupMember.user_id, Post.id, Post.group_id, Post.created_at)
+            .join(GroupMember, GroupMember.group_id == Post.group_id)
+            .join(Group, Group.id == Post.group_id)
+            .where(Group.fanout_on_read.is_(False))
+        )
+    )
+    db.commit()
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        rebuild_timelines(db)
+        print("Timelines rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
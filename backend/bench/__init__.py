@@ -0,0 +1,23 @@
+# Benchmarks, run from the backend directory:
+#   python -m bench.seed --users 20000 --groups 2000 --posts 1000000
+#   python -m bench.run --duration 60 --concurrency 32 [--base-url http://localhost:8000]
+#   python -m bench.compare bench/results/old.json bench/results/new.json
+# The seeder writes straight into the configured database (DATABASE_URL),
+# run the migrations first. The runner logs in as seeded users, so both
+# need the same --prefix.
+
+DEFAULT_PREFIX = "bench"
+PASSWORD = "benchpass"
+
+# Vocabulary for generated posts, comments and group names, and for search
+# terms, so searches find something
+WORDS = (
+    "garden", "coffee", "weekend", "project", "music", "travel", "photo", "recipe", "running", "book",
+    "movie", "design", "python", "football", "camera", "mountain", "river", "city", "market", "concert",
+    "painting", "startup", "science", "history", "cycling", "yoga", "kitchen", "bread", "winter", "summer",
+    "holiday", "family", "puppy", "kitten", "meetup", "workshop", "festival", "podcast", "language", "guitar",
+    "piano", "theatre", "hiking", "climbing", "sailing", "chess", "gaming", "robot", "rocket", "planet",
+    "ocean", "forest", "village", "museum", "library", "school", "teacher", "student", "doctor", "nurse",
+    "the", "a", "and", "with", "for", "today", "tomorrow", "great", "new", "old",
+    "first", "best", "small", "big", "quick", "slow", "happy", "early", "late", "local",
+)
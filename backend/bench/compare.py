@@ -0,0 +1,41 @@
+import argparse
+import json
+
+
+# Side by side latencies and throughput of two result files, with the
+# change relative to the first
+
+METRICS = ("throughput", "p50_ms", "p95_ms", "p99_ms")
+
+
+def change(old, new) -> str:
+    if not old:
+        return ""
+    return f"{(new - old) / old * 100:+.1f}%"
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline.get('git_commit')}  {baseline['started_at']}")
+    print(f"candidate {candidate.get('git_commit')}  {candidate['started_at']}")
+    names = sorted(set(baseline["scenarios"]) | set(candidate["scenarios"]))
+    rows = [(name, baseline["scenarios"].get(name), candidate["scenarios"].get(name)) for name in names]
+    rows.append(("total", baseline.get("total"), candidate.get("total")))
+    print(f"{'scenario':<14}{'metric':<12}{'baseline':>10}{'candidate':>11}{'change':>9}")
+    for name, old, new in rows:
+        if not old or not new:
+            print(f"{name:<14}only in {'candidate' if new else 'baseline'}")
+            continue
+        for metric in METRICS:
+            print(f"{name:<14}{metric:<12}{old[metric]:>10}{new[metric]:>11}{change(old[metric], new[metric]):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timezone
+import httpx
+from bench import DEFAULT_PREFIX, PASSWORD, WORDS
+
+
+# Closed-loop load: each virtual user logs in as a seeded user, loads its
+# groups, then runs weighted scenarios back to back until the time is up.
+# Against --base-url it measures a running server, without it the app is
+# served in this process (no network, one event loop shared with the load).
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# name -> weight, login is timed once per virtual user on top of these
+SCENARIOS = {
+    "home_feed": 30,
+    "group_feed": 20,
+    "post_detail": 20,
+    "react": 12,
+    "comment": 6,
+    "group_search": 12,
+}
+
+# Statuses that are a normal answer rather than an error
+EXPECTED = {"group_search": {200, 404}}
+
+# Done once per virtual user, mostly during the warmup; recorded regardless
+SETUP = ("login", "my_groups")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.recording = False
+
+    def record(self, name: str, seconds: float, status: int):
+        if not self.recording and name not in SETUP:
+            return
+        self.latencies[name].append(seconds)
+        self.statuses[name][status] += 1
+        if status not in EXPECTED.get(name, range(200, 400)):
+            self.errors[name] += 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, args):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.args = args
+        self.headers = {}
+        self.groups = []
+        # Posts seen in feeds, the targets of detail views and reactions
+        self.posts = deque(maxlen=200)
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(name, time.perf_counter() - started, 0)
+            return None
+        self.recorder.record(name, time.perf_counter() - started, response.status_code)
+        return response
+
+    async def login(self):
+        username = f"{self.args.prefix}{self.rng.randrange(self.args.users)}"
+        response = await self.request("login", "POST", "/user/login", data={"username": username, "password": PASSWORD})
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await self.request("my_groups", "GET", "/group/mygroups")
+        if response is not None and response.status_code == 200:
+            self.groups = [group["id"] for group in response.json()]
+        return True
+
+    def remember(self, response):
+        if response is not None and response.status_code == 200:
+            page = response.json()
+            self.posts.extend(post["id"] for post in page["posts"])
+            return page.get("next_cursor")
+
+    async def home_feed(self):
+        # First page, sometimes scrolled a page or two further
+        cursor = self.remember(await self.request("home_feed", "GET", "/posts/my-groups", params={"per_page": 10}))
+        while cursor and self.rng.random() < 0.3:
+            cursor = self.remember(await self.request(
+                "home_feed", "GET", "/posts/my-groups",
+                params={"per_page": 10, "cursor": cursor, "include_total": "false"}
+            ))
+
+    async def group_feed(self):
+        if not self.groups:
+            return await self.home_feed()
+        group_id = self.rng.choice(self.groups)
+        self.remember(await self.request("group_feed", "GET", f"/posts/group/{group_id}", params={"per_page": 10}))
+
+    async def post_detail(self):
+        if not self.posts:
+            return await self.home_feed()
+        await self.request("post_detail", "GET", f"/posts/{self.rng.choice(self.posts)}")
+
+    async def react(self):
+        if not self.posts:
+            return await self.home_feed()
+        reaction_type = "like" if self.rng.random() < 0.8 else "dislike"
+        await self.request("react", "POST", f"/posts/{self.rng.choice(self.posts)}/reaction", params={"reaction_type": reaction_type})
+
+    async def comment(self):
+        if not self.posts:
+            return await self.home_feed()
+        text = " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(2, 20)))
+        await self.request("comment", "POST", f"/posts/{self.rng.choice(self.posts)}/comment", data={"text": text})
+
+    async def group_search(self):
+        await self.request("group_search", "GET", "/group/search", params={"name": self.rng.choice(WORDS)})
+
+    async def run(self, deadline: float):
+        if not await self.login():
+            return
+        names, weights = list(SCENARIOS), list(SCENARIOS.values())
+        while time.monotonic() < deadline:
+            await getattr(self, self.rng.choices(names, weights)[0])()
+
+
+def percentile(values: list, q: float) -> float:
+    # Nearest rank on sorted values
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+def summarize(latencies: list, errors: int, statuses: Counter, seconds: float):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput": round(len(values) / seconds, 2),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        "mean_ms": round(sum(values) / len(values) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def load(client: httpx.AsyncClient, args, recorder: Recorder):
+    # Virtual users start staggered over a second so logins don't all queue
+    # on the password pool at once
+    rng = random.Random(args.seed)
+    started = time.monotonic()
+    deadline = started + args.warmup + args.duration
+    tasks = []
+    for i in range(args.concurrency):
+        user = VirtualUser(client, recorder, random.Random(rng.random()), args)
+        tasks.append(asyncio.create_task(user.run(deadline)))
+        await asyncio.sleep(1 / args.concurrency)
+    await asyncio.sleep(max(0, started + args.warmup - time.monotonic()))
+    recorder.recording = True
+    measured = time.monotonic()
+    await asyncio.gather(*tasks)
+    return time.monotonic() - measured
+
+async def run(args):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+            seconds = await load(client, args, recorder)
+    else:
+        from app.main import create_app
+        app = create_app()
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                seconds = await load(client, args, recorder)
+    return recorder, seconds
+
+def report(args, recorder: Recorder, seconds: float):
+    scenarios = {
+        name: summarize(latencies, recorder.errors[name], recorder.statuses[name], seconds)
+        for name, latencies in sorted(recorder.latencies.items())
+    }
+    everything = [value for name, latencies in recorder.latencies.items() if name not in SETUP for value in latencies]
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "target": args.base_url or "in-process",
+        "python": platform.python_version(),
+        "params": {
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "prefix": args.prefix,
+            "seed": args.seed,
+        },
+        "seconds": round(seconds, 2),
+        "total": summarize(
+            everything, sum(count for name, count in recorder.errors.items() if name not in SETUP), Counter(), seconds
+        ) if everything else None,
+        "scenarios": scenarios,
+    }
+
+def print_table(result: dict):
+    print(f"{'scenario':<14}{'count':>8}{'errors':>8}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = list(result["scenarios"].items()) + ([("total", result["total"])] if result["total"] else [])
+    for name, stats in rows:
+        print(
+            f"{name:<14}{stats['count']:>8}{stats['errors']:>8}{stats['throughput']:>9}"
+            f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark scenarios and write the results as JSON")
+    parser.add_argument("--base-url", help="server to load, the app is served in-process without it")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds run before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--users", type=int, default=2000, help="seeded users to log in as")
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="username prefix used when seeding")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="result file, by default bench/results/<time>.json")
+    args = parser.parse_args()
+
+    recorder, seconds = asyncio.run(run(args))
+    result = report(args, recorder, seconds)
+    print_table(result)
+    out = args.out or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, select, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.db import init_db, get_engine, SessionLocal
+from app.dbmodels import User, Group, GroupMember, Post, Comment, Reaction, MediaVariant
+from app.api.auth import pwd_context
+from app.images import Image, render_variants, AVATAR_VARIANTS, POST_VARIANTS
+from app.storage import store_blob
+from app.counters import rebuild_counters
+from app.timeline import TIMELINE_FANOUT, rebuild_timelines
+from bench import DEFAULT_PREFIX, PASSWORD, WORDS
+
+
+# Synthetic data written straight into the configured database with
+# multi-row inserts, a few thousand rows per statement. Distributions are
+# skewed like real ones: group sizes follow a power law, busy groups get
+# more posts, comment and reaction counts are exponential.
+# Seeded users all share PASSWORD, hashed once.
+
+NOW = datetime.now(timezone.utc)
+
+
+def sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+def some_time(rng: random.Random, days: int) -> datetime:
+    return NOW - timedelta(seconds=rng.randrange(days * 86400))
+
+def make_image(rng: random.Random, width: int, height: int) -> bytes:
+    # A colour gradient under noise compresses about like a photo does,
+    # so stored sizes are realistic
+    noise = Image.effect_noise((width, height), rng.randint(40, 90))
+    gradient = Image.linear_gradient("L").rotate(rng.randrange(360)).resize((width, height))
+    channels = [Image.blend(gradient, noise, rng.uniform(0.2, 0.5)).point(lambda v, k=rng.uniform(0.5, 1.0): int(v * k)) for _ in range(3)]
+    out = io.BytesIO()
+    Image.merge("RGB", channels).save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+def seed_image(conn, data: bytes, names: tuple) -> str:
+    # Same steps as app.images.ingest_image, synchronously
+    blob_hash = store_blob(data)
+    for name, variant in render_variants(data, names).items():
+        conn.execute(
+            sqlite_insert(MediaVariant)
+            .values(source_hash=blob_hash, variant=name, blob_hash=store_blob(variant))
+            .on_conflict_do_nothing()
+        )
+    return blob_hash
+
+def image_pool(conn, rng: random.Random, count: int, size: tuple, names: tuple):
+    if Image is None or not count:
+        return []
+    return [seed_image(conn, make_image(rng, *size), names) for _ in range(count)]
+
+
+def next_id(conn, model) -> int:
+    return (conn.scalar(select(func.max(model.id))) or 0) + 1
+
+def flush(conn, model, rows: list):
+    if rows:
+        conn.execute(insert(model), rows)
+        rows.clear()
+
+def fast_writes(conn):
+    # A lost seed run is simply re-run: no syncing, and a page cache big
+    # enough that index and FTS pages aren't spilled mid-transaction
+    conn.exec_driver_sql("PRAGMA synchronous=OFF")
+    conn.exec_driver_sql("PRAGMA cache_size=-262144")
+
+def progress(label: str, done: int, total: int, started: float):
+    print(f"{label}: {done}/{total} ({time.monotonic() - started:.1f}s)", flush=True)
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    engine = get_engine()
+    started = time.monotonic()
+    summary = {"prefix": args.prefix, "seed": args.seed}
+
+    with engine.begin() as conn:
+        fast_writes(conn)
+        if conn.scalar(select(User.id).where(User.username == f"{args.prefix}0")):
+            raise SystemExit(f"Users with prefix {args.prefix!r} already exist, pick another --prefix")
+        avatars = image_pool(conn, rng, args.avatar_pool, (400, 400), AVATAR_VARIANTS)
+        post_images = image_pool(conn, rng, args.image_pool, (1600, 1200), POST_VARIANTS)
+    summary["images"] = len(avatars) + len(post_images)
+    progress("images", summary["images"], args.avatar_pool + args.image_pool, started)
+
+    password_hash = pwd_context.hash(PASSWORD)
+    with engine.begin() as conn:
+        first_user = next_id(conn, User)
+        rows = []
+        for i in range(args.users):
+            username = f"{args.prefix}{i}"
+            rows.append({
+                "id": first_user + i,
+                "username": username,
+                "email": f"{username}@bench.local",
+                "hashed_password": password_hash,
+                "registration_date": some_time(rng, 730),
+                "role": "user",
+                "status": "active",
+                "avatar_hash": rng.choice(avatars) if avatars and rng.random() < 0.7 else None,
+            })
+            if len(rows) >= args.batch:
+                flush(conn, User, rows)
+        flush(conn, User, rows)
+    user_ids = range(first_user, first_user + args.users)
+    summary["users"] = args.users
+    progress("users", args.users, args.users, started)
+
+    # Power-law group sizes with the requested mean (a Pareto with alpha 1.5
+    # has mean 3)
+    members = {}
+    with engine.begin() as conn:
+        first_group = next_id(conn, Group)
+        groups, memberships = [], []
+        for i in range(args.groups):
+            group_id = first_group + i
+            size = min(args.users, max(2, int(rng.paretovariate(1.5) * args.members / 3)))
+            members[group_id] = rng.sample(user_ids, size)
+            groups.append({
+                "id": group_id,
+                "name": f"{sentence(rng, 1, 3)} {args.prefix} {i}",
+                "description": sentence(rng, 5, 25),
+                "creation_date": some_time(rng, 730),
+                "public": rng.random() < 0.8,
+                "avatar_hash": rng.choice(avatars) if avatars and rng.random() < 0.5 else None,
+            })
+            for position, user_id in enumerate(members[group_id]):
+                memberships.append({"group_id": group_id, "user_id": user_id, "role": "admin" if position == 0 else "user"})
+            if len(groups) >= args.batch:
+                flush(conn, Group, groups)
+            if len(memberships) >= args.batch:
+                flush(conn, GroupMember, memberships)
+        flush(conn, Group, groups)
+        flush(conn, GroupMember, memberships)
+    summary["groups"] = args.groups
+    summary["memberships"] = sum(len(m) for m in members.values())
+    progress("groups", args.groups, args.groups, started)
+
+    # Busier groups post more
+    group_ids = list(members)
+    weights = [len(members[group_id]) for group_id in group_ids]
+    counts = {"posts": 0, "comments": 0, "reactions": 0}
+    with engine.begin() as conn:
+        post_id = next_id(conn, Post)
+        comment_id = next_id(conn, Comment)
+    while counts["posts"] < args.posts:
+        chunk = min(args.batch, args.posts - counts["posts"])
+        posts, comments, reactions = [], [], []
+        for group_id in rng.choices(group_ids, weights, k=chunk):
+            group_members = members[group_id]
+            created_at = some_time(rng, 365)
+            posts.append({
+                "id": post_id,
+                "group_id": group_id,
+                "user_id": rng.choice(group_members),
+                "content": sentence(rng, 5, 60),
+                "image_hash": rng.choice(post_images) if post_images and rng.random() < 0.15 else None,
+                "created_at": created_at,
+            })
+            for _ in range(int(rng.expovariate(1 / args.comments)) if args.comments else 0):
+                commented_at = created_at + timedelta(minutes=rng.randrange(1, 4320))
+                comments.append({
+                    "id": comment_id,
+                    "post_id": post_id,
+                    "user_id": rng.choice(group_members),
+                    "text": sentence(rng, 2, 30),
+                    "created_at": commented_at,
+                })
+                for user_id in rng.sample(group_members, min(len(group_members), int(rng.expovariate(1.0)))):
+                    reactions.append({
+                        "post_id": None,
+                        "comment_id": comment_id,
+                        "user_id": user_id,
+                        "type": "like",
+                        "created_at": commented_at + timedelta(minutes=rng.randrange(1, 1440)),
+                    })
+                comment_id += 1
+            reacting = int(rng.expovariate(1 / args.reactions)) if args.reactions else 0
+            for user_id in rng.sample(group_members, min(len(group_members), reacting)):
+                reactions.append({
+                    "post_id": post_id,
+                    "comment_id": None,
+                    "user_id": user_id,
+                    "type": "like" if rng.random() < 0.8 else "dislike",
+                    "created_at": created_at + timedelta(minutes=rng.randrange(1, 4320)),
+                })
+            post_id += 1
+        counts["posts"] += len(posts)
+        counts["comments"] += len(comments)
+        counts["reactions"] += len(reactions)
+        with engine.begin() as conn:
+            fast_writes(conn)
+            flush(conn, Post, posts)
+            for start in range(0, len(comments), args.batch):
+                flush(conn, Comment, comments[start:start + args.batch])
+            for start in range(0, len(reactions), args.batch):
+                flush(conn, Reaction, reactions[start:start + args.batch])
+        progress("posts", counts["posts"], args.posts, started)
+    summary.update(counts)
+
+    db = SessionLocal()
+    try:
+        rebuild_counters(db)
+        if TIMELINE_FANOUT:
+            rebuild_timelines(db)
+    finally:
+        db.close()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    summary["seconds"] = round(time.monotonic() - started, 1)
+    print(json.dumps(summary))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the configured database with synthetic data")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--members", type=int, default=50, help="mean members per group")
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--comments", type=float, default=3, help="mean comments per post")
+    parser.add_argument("--reactions", type=float, default=5, help="mean reactions per post")
+    parser.add_argument("--avatar-pool", type=int, default=50, help="distinct avatar images")
+    parser.add_argument("--image-pool", type=int, default=20, help="distinct post images")
+    parser.add_argument("--batch", type=int, default=5000, help="rows per insert")
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="username prefix")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    init_db()
+    seed(args)
+
+
+if __name__ == "__main__":
+    main()
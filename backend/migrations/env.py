@@ -0,0 +1,56 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from app.db import Base
+from app.settings import Settings
+import app.dbmodels  # registers the tables on Base.metadata
+
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+# DATABASE_URL, like the app, see app/settings.py
+engine = create_engine(Settings.from_env().db_url)
+
+# FTS5 tables and their shadow tables are created with raw SQL in the
+# migrations, autogenerate must not try to drop them
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and compare_to is None and "_fts" in name:
+        return False
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        include_object=include_object,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # render_as_batch: SQLite can't ALTER most things, batch mode rebuilds
+    # the table instead
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,154 @@
+"""baseline schema
+
+The schema create_all built at startup before migrations were introduced.
+A database created that way is brought under migrations with
+`alembic stamp 0001`, then `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 08:31:02.539386
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('groups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('avatar', sa.LargeBinary(), nullable=True),
+    sa.Column('creation_date', sa.DateTime(), nullable=False),
+    sa.Column('public', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_groups_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_groups_name'), ['name'], unique=True)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('avatar', sa.LargeBinary(), nullable=True),
+    sa.Column('registration_date', sa.DateTime(), nullable=False),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_username'), ['username'], unique=True)
+
+    op.create_table('groupmembers',
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('group_id', 'user_id')
+    )
+    with op.batch_alter_table('groupmembers', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_groupmembers_group_id'), ['group_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_groupmembers_user_id'), ['user_id'], unique=False)
+
+    op.create_table('posts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.String(), nullable=False),
+    sa.Column('image', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_posts_group_id'), ['group_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_posts_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_posts_user_id'), ['user_id'], unique=False)
+
+    op.create_table('comments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('text', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_comments_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_comments_post_id'), ['post_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_comments_user_id'), ['user_id'], unique=False)
+
+    op.create_table('reactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('comment_id', sa.Integer(), nullable=True),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['comment_id'], ['comments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reactions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_reactions_comment_id'), ['comment_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_reactions_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_reactions_post_id'), ['post_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_reactions_user_id'), ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('reactions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_reactions_user_id'))
+        batch_op.drop_index(batch_op.f('ix_reactions_post_id'))
+        batch_op.drop_index(batch_op.f('ix_reactions_id'))
+        batch_op.drop_index(batch_op.f('ix_reactions_comment_id'))
+
+    op.drop_table('reactions')
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_comments_user_id'))
+        batch_op.drop_index(batch_op.f('ix_comments_post_id'))
+        batch_op.drop_index(batch_op.f('ix_comments_id'))
+
+    op.drop_table('comments')
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_posts_user_id'))
+        batch_op.drop_index(batch_op.f('ix_posts_id'))
+        batch_op.drop_index(batch_op.f('ix_posts_group_id'))
+
+    op.drop_table('posts')
+    with op.batch_alter_table('groupmembers', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_groupmembers_user_id'))
+        batch_op.drop_index(batch_op.f('ix_groupmembers_group_id'))
+
+    op.drop_table('groupmembers')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_username'))
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_groups_name'))
+        batch_op.drop_index(batch_op.f('ix_groups_id'))
+
+    op.drop_table('groups')
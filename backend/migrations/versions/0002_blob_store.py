@@ -0,0 +1,79 @@
+"""blob store
+
+Avatars and post images move out of the database into the blob store,
+rows keep the sha256 of their image. The existing images are written to
+the configured store (MEDIA_STORE / MEDIA_ROOT, see app/storage.py), so
+set those as the app has them before upgrading.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 08:31:10.104233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.storage import get_blob_store, store_blob
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (image column, hash column)
+IMAGE_COLUMNS = {
+    'groups': ('avatar', 'avatar_hash'),
+    'users': ('avatar', 'avatar_hash'),
+    'posts': ('image', 'image_hash'),
+}
+
+# Rows read per query, images are held in memory a batch at a time
+BATCH = 500
+
+
+def copy_column(table: str, source: str, target: str, convert):
+    # Walks the rows with an image by id, converting source into target
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(f"SELECT id, {source} FROM {table} WHERE id > :last_id AND {source} IS NOT NULL ORDER BY id LIMIT :batch"),
+            {"last_id": last_id, "batch": BATCH}
+        ).all()
+        if not rows:
+            return
+        conn.execute(
+            sa.text(f"UPDATE {table} SET {target} = :value WHERE id = :id"),
+            [{"id": row_id, "value": convert(value)} for row_id, value in rows]
+        )
+        last_id = rows[-1][0]
+
+def read_blob(blob_hash: str) -> bytes:
+    with get_blob_store().open(blob_hash) as f:
+        return f.read()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, (image, image_hash) in IMAGE_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(image_hash, sa.String(length=64), nullable=True))
+        # Blobs are content addressed, an image shared by several rows is
+        # stored once
+        copy_column(table, image, image_hash, store_blob)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column(image)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The blobs stay in the store, other rows may share them
+    for table, (image, image_hash) in reversed(IMAGE_COLUMNS.items()):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(image, sa.LargeBinary(), nullable=True))
+        copy_column(table, image_hash, image, read_blob)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column(image_hash)
@@ -0,0 +1,36 @@
+"""media variants
+
+Resized variants of uploaded images. Images stored before this have none,
+the media endpoint serves their original.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 08:31:14.861027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_variants',
+    sa.Column('source_hash', sa.String(length=64), nullable=False),
+    sa.Column('variant', sa.String(), nullable=False),
+    sa.Column('blob_hash', sa.String(length=64), nullable=False),
+    sa.PrimaryKeyConstraint('source_hash', 'variant')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('media_variants')
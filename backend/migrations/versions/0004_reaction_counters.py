@@ -0,0 +1,66 @@
+"""reaction counters
+
+Like and dislike counts kept on posts and comments. A comment reaction
+no longer points at the post, so post_id becomes nullable.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 08:31:19.517690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def count_reactions(target: str, reaction_type: str, table: str) -> str:
+    return (
+        f"(SELECT count(*) FROM reactions WHERE reactions.{target} = {table}.id"
+        f" AND reactions.type = '{reaction_type}')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('dislike_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('dislike_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('reactions', schema=None) as batch_op:
+        batch_op.alter_column('post_id', existing_type=sa.Integer(), nullable=True)
+
+    # Existing reactions, counted the way app/counters.py rebuild_counters does
+    op.execute("UPDATE reactions SET post_id = NULL WHERE comment_id IS NOT NULL")
+    for table, target in (("posts", "post_id"), ("comments", "comment_id")):
+        op.execute(
+            f"UPDATE {table} SET like_count = {count_reactions(target, 'like', table)},"
+            f" dislike_count = {count_reactions(target, 'dislike', table)}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Comment reactions have no post to point at
+    op.execute("DELETE FROM reactions WHERE post_id IS NULL")
+    with op.batch_alter_table('reactions', schema=None) as batch_op:
+        batch_op.alter_column('post_id', existing_type=sa.Integer(), nullable=False)
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('dislike_count')
+        batch_op.drop_column('like_count')
+
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_column('dislike_count')
+        batch_op.drop_column('like_count')
@@ -0,0 +1,34 @@
+"""comment counts
+
+Comment count kept on posts, for feeds that embed comment previews.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 08:31:23.930412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute("UPDATE posts SET comment_count = (SELECT count(*) FROM comments WHERE comments.post_id = posts.id)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
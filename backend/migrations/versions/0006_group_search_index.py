@@ -0,0 +1,45 @@
+"""group search index
+
+FTS5 index over group names and descriptions, see app/search.py. It is an
+external content table: triggers keep it in sync with groups, and the
+existing groups are indexed once here.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 08:31:28.402177
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The update trigger only fires for the indexed columns, other updates
+# must not rewrite the index rows
+SEARCH_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE groups_fts USING fts5(name, description, content='groups', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER groups_fts_ai AFTER INSERT ON groups BEGIN INSERT INTO groups_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END',
+    "CREATE TRIGGER groups_fts_ad AFTER DELETE ON groups BEGIN INSERT INTO groups_fts(groups_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER groups_fts_au AFTER UPDATE OF name, description ON groups BEGIN INSERT INTO groups_fts(groups_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); INSERT INTO groups_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO groups_fts(groups_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for stmt in SEARCH_INDEX_DDL:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The triggers are on groups, dropping the index leaves them behind
+    for trigger in ("ai", "ad", "au"):
+        op.execute(f"DROP TRIGGER IF EXISTS groups_fts_{trigger}")
+    op.execute("DROP TABLE IF EXISTS groups_fts")
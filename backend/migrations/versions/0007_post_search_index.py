@@ -0,0 +1,52 @@
+"""post search index
+
+FTS5 indexes over post content and comment text, kept in sync by
+triggers like groups_fts. Existing rows are indexed once here.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 08:31:32.775064
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Update triggers only fire for the indexed columns: counter bumps and
+# updated_at touches must not rewrite the index rows
+SEARCH_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE posts_fts USING fts5(content, content='posts', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER posts_fts_ai AFTER INSERT ON posts BEGIN INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content); END',
+    "CREATE TRIGGER posts_fts_ad AFTER DELETE ON posts BEGIN INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER posts_fts_au AFTER UPDATE OF content ON posts BEGIN INSERT INTO posts_fts(posts_fts, rowid, content) VALUES ('delete', old.id, old.content); INSERT INTO posts_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE VIRTUAL TABLE comments_fts USING fts5(text, content='comments', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER comments_fts_ai AFTER INSERT ON comments BEGIN INSERT INTO comments_fts(rowid, text) VALUES (new.id, new.text); END',
+    "CREATE TRIGGER comments_fts_ad AFTER DELETE ON comments BEGIN INSERT INTO comments_fts(comments_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER comments_fts_au AFTER UPDATE OF text ON comments BEGIN INSERT INTO comments_fts(comments_fts, rowid, text) VALUES ('delete', old.id, old.text); INSERT INTO comments_fts(rowid, text) VALUES (new.id, new.text); END",
+    "INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')",
+    "INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')",
+)
+SEARCH_INDEXES = ("posts_fts", "comments_fts")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for stmt in SEARCH_INDEX_DDL:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for index in SEARCH_INDEXES:
+        # The triggers are on the source table, dropping the index leaves
+        # them behind
+        for trigger in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {index}_{trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {index}")
@@ -0,0 +1,54 @@
+"""home timelines
+
+Fan-out-on-write home timelines, see app/timeline.py. They start empty:
+with TIMELINE_FANOUT on, fill them with `python -m app.timeline`.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 08:31:37.226981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fanout_on_read', sa.Boolean(), server_default='0', nullable=False))
+
+    op.create_table('timeline_entries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    with op.batch_alter_table('timeline_entries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_timeline_entries_group_id'), ['group_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_timeline_entries_post_id'), ['post_id'], unique=False)
+        batch_op.create_index('ix_timeline_entries_user_created', ['user_id', 'created_at', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('timeline_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_timeline_entries_user_created')
+        batch_op.drop_index(batch_op.f('ix_timeline_entries_post_id'))
+        batch_op.drop_index(batch_op.f('ix_timeline_entries_group_id'))
+
+    op.drop_table('timeline_entries')
+    # Not in batch mode, see 0009
+    op.execute("ALTER TABLE groups DROP COLUMN fanout_on_read")
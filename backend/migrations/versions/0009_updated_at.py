@@ -0,0 +1,44 @@
+"""updated_at
+
+Last change time on users, groups, memberships and posts, used as cache
+validators. Existing rows start without one.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 08:31:41.683512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('users', 'groups', 'groupmembers', 'posts')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_group_updated', ['group_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_group_updated')
+
+    # Not in batch mode: rebuilding groups and posts would lose their
+    # search index triggers. DROP COLUMN needs SQLite 3.35.
+    for table in reversed(TABLES):
+        op.execute(f"ALTER TABLE {table} DROP COLUMN updated_at")
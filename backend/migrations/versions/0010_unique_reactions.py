@@ -0,0 +1,50 @@
+"""unique reactions
+
+One reaction per user and target. Older databases could hold several,
+the newest is kept.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 08:31:44.018350
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TARGETS = ('post_id', 'comment_id')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same as app/counters.py dedupe_reactions, then the counters are
+    # recounted from what is left
+    for target in TARGETS:
+        op.execute(
+            f"DELETE FROM reactions WHERE {target} IS NOT NULL AND id NOT IN"
+            f" (SELECT max(id) FROM reactions WHERE {target} IS NOT NULL GROUP BY {target}, user_id)"
+        )
+    for table, target in (('posts', 'post_id'), ('comments', 'comment_id')):
+        op.execute(
+            f"UPDATE {table} SET"
+            f" like_count = (SELECT count(*) FROM reactions WHERE {target} = {table}.id AND type = 'like'),"
+            f" dislike_count = (SELECT count(*) FROM reactions WHERE {target} = {table}.id AND type = 'dislike')"
+        )
+
+    with op.batch_alter_table('reactions', schema=None) as batch_op:
+        batch_op.create_index('uq_reactions_comment_user', ['comment_id', 'user_id'], unique=True)
+        batch_op.create_index('uq_reactions_post_user', ['post_id', 'user_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('reactions', schema=None) as batch_op:
+        batch_op.drop_index('uq_reactions_post_user')
+        batch_op.drop_index('uq_reactions_comment_user')
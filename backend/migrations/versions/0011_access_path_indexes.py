@@ -0,0 +1,70 @@
+"""access path indexes
+
+Composite indexes matching the feed, comment and membership queries, so
+their ORDER BY walks an index instead of sorting. Single-column indexes
+that became a prefix of a composite one are dropped.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 08:31:46.370193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, Sequence[str], None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_comments_post_id'))
+        batch_op.create_index('ix_comments_post_created', ['post_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('groupmembers', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_groupmembers_group_id'))
+        batch_op.drop_index(batch_op.f('ix_groupmembers_user_id'))
+        batch_op.create_index('ix_groupmembers_user_group', ['user_id', 'group_id'], unique=False)
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_posts_group_id'))
+        batch_op.drop_index(batch_op.f('ix_posts_user_id'))
+        batch_op.create_index('ix_posts_group_created', ['group_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_posts_user_created', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('reactions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_reactions_comment_id'))
+        batch_op.drop_index(batch_op.f('ix_reactions_post_id'))
+
+    # Fresh statistics so the planner picks the new indexes
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('reactions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_reactions_post_id'), ['post_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_reactions_comment_id'), ['comment_id'], unique=False)
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_user_created')
+        batch_op.drop_index('ix_posts_group_created')
+        batch_op.create_index(batch_op.f('ix_posts_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_posts_group_id'), ['group_id'], unique=False)
+
+    with op.batch_alter_table('groupmembers', schema=None) as batch_op:
+        batch_op.drop_index('ix_groupmembers_user_group')
+        batch_op.create_index(batch_op.f('ix_groupmembers_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_groupmembers_group_id'), ['group_id'], unique=False)
+
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_post_created')
+        batch_op.create_index(batch_op.f('ix_comments_post_id'), ['post_id'], unique=False)
+
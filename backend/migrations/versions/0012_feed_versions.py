@@ -0,0 +1,39 @@
+"""feed versions
+
+A version per group, bumped by every write shown in its feed, replaces
+max(posts.updated_at) as the feed validator, so its index goes.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 13:02:45.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, Sequence[str], None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('feed_version', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_group_updated')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_group_updated', ['group_id', 'updated_at'], unique=False)
+
+    # Not in batch mode, see 0009
+    op.execute("ALTER TABLE groups DROP COLUMN feed_version")
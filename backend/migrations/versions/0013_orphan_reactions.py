@@ -0,0 +1,45 @@
+"""orphan reactions
+
+The app now runs with SQLite foreign keys on, so deleting a comment or a
+post deletes its reactions. Before that they were left behind, and a new
+comment reusing the rowid picked them up. Those are deleted here: the ones
+whose target is gone, and the ones older than their comment. Comment
+counters are then recounted, and every feed version bumped.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 15:12:08.640271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, Sequence[str], None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DELETE FROM reactions WHERE post_id IS NOT NULL AND post_id NOT IN (SELECT id FROM posts)")
+    op.execute("DELETE FROM reactions WHERE comment_id IS NOT NULL AND comment_id NOT IN (SELECT id FROM comments)")
+    op.execute(
+        "DELETE FROM reactions WHERE comment_id IS NOT NULL"
+        " AND created_at < (SELECT created_at FROM comments WHERE comments.id = reactions.comment_id)"
+    )
+    op.execute(
+        "UPDATE comments SET"
+        " like_count = (SELECT count(*) FROM reactions WHERE comment_id = comments.id AND type = 'like'),"
+        " dislike_count = (SELECT count(*) FROM reactions WHERE comment_id = comments.id AND type = 'dislike')"
+    )
+    op.execute("UPDATE groups SET feed_version = feed_version + 1")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The orphans are gone for good, there is nothing to restore
+    pass
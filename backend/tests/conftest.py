@@ -0,0 +1,95 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+# Read at import time by the app modules, so set before any of them loads
+TEST_ROOT = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["MEDIA_ROOT"] = os.path.join(TEST_ROOT, "media")
+# Metrics stay in this process
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from app.main import create_app
+from app.settings import Settings
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    # Migrated once, every test gets its own copy
+    path = os.path.join(TEST_ROOT, "template.db")
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    finally:
+        if previous is None:
+            del os.environ["DATABASE_URL"]
+        else:
+            os.environ["DATABASE_URL"] = previous
+    yield path
+    shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+
+@pytest.fixture
+def db_path(migrated_db, tmp_path):
+    path = str(tmp_path / "test.db")
+    shutil.copy(migrated_db, path)
+    return path
+
+
+@pytest.fixture
+def client(db_path):
+    settings = Settings(db_url=f"sqlite:///{db_path}", warmup=False)
+    with TestClient(create_app(settings)) as client:
+        yield client
+
+
+@pytest.fixture
+def sql(db_path):
+    # Direct access for setting up and checking rows
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def make_user(client, sql):
+    # Registers a user, returns (id, auth headers)
+    def make_user(username: str, role: str = "user"):
+        response = client.post(
+            "/user/register", json={"username": username, "password": "pw", "email": f"{username}@example.com"}
+        )
+        assert response.status_code == 200, response.text
+        if role != "user":
+            sql.execute("UPDATE users SET role = ? WHERE username = ?", (role, username))
+            sql.commit()
+        response = client.post("/user/login", data={"username": username, "password": "pw"})
+        assert response.status_code == 200, response.text
+        user_id = sql.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()[0]
+        return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return make_user
+
+
+@pytest.fixture
+def make_group(client):
+    def make_group(headers, name: str = "group", public: bool = True):
+        response = client.post(
+            "/group/", data={"name": name, "description": f"{name} description", "public": str(public).lower()},
+            headers=headers
+        )
+        assert response.status_code == 200, response.text
+        return response.json()["result"]
+    return make_group
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
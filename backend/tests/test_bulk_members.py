@@ -0,0 +1,86 @@
+import pytest
+
+
+@pytest.fixture
+def group(make_user, make_group):
+    # A group with owner as its only admin, plus two users outside it
+    owner = make_user("owner")
+    group_id = make_group(owner[1])
+    return group_id, owner, make_user("u1")[0], make_user("u2")[0]
+
+def bulk(client, headers, group_id, **changes):
+    return client.post(f"/group/{group_id}/members", json=changes, headers=headers)
+
+def roles(sql, group_id):
+    return dict(sql.execute("SELECT user_id, role FROM groupmembers WHERE group_id = ?", (group_id,)).fetchall())
+
+
+def test_add_remove_and_change_roles(client, sql, group):
+    group_id, (owner_id, owner), u1, u2 = group
+    response = bulk(client, owner, group_id, add=[{"user_id": u1, "role": "user"}, {"user_id": u2, "role": "user"}])
+    assert response.status_code == 200, response.text
+    assert [r["result"] for r in response.json()["result"]] == ["Added", "Added"]
+    assert roles(sql, group_id) == {owner_id: "admin", u1: "user", u2: "user"}
+
+    response = bulk(client, owner, group_id, remove=[u1], roles=[{"user_id": u2, "role": "admin"}])
+    assert response.status_code == 200, response.text
+    assert [r["result"] for r in response.json()["result"]] == ["Removed", "Updated role to admin"]
+    assert roles(sql, group_id) == {owner_id: "admin", u2: "admin"}
+
+
+def test_every_user_gets_a_result(client, sql, group):
+    group_id, (owner_id, owner), u1, u2 = group
+    response = bulk(
+        client, owner, group_id,
+        add=[{"user_id": owner_id, "role": "user"}, {"user_id": 9999, "role": "user"}, {"user_id": u1, "role": "boss"}],
+        remove=[u2],
+        roles=[{"user_id": u2, "role": "admin"}]
+    )
+    assert response.status_code == 200, response.text
+    assert [r["result"] for r in response.json()["result"]] == [
+        "Already a member", "User not found", "Invalid role", "Not a member", "Duplicate user in request"
+    ]
+    assert roles(sql, group_id) == {owner_id: "admin"}
+
+
+def test_cannot_remove_the_last_admin(client, sql, group):
+    group_id, (owner_id, owner), u1, _ = group
+    bulk(client, owner, group_id, add=[{"user_id": u1, "role": "user"}])
+
+    response = bulk(client, owner, group_id, remove=[owner_id])
+    assert response.status_code == 400
+    # The whole request is refused, the other changes in it too
+    response = bulk(client, owner, group_id, remove=[u1], roles=[{"user_id": owner_id, "role": "user"}])
+    assert response.status_code == 400
+    assert roles(sql, group_id) == {owner_id: "admin", u1: "user"}
+
+
+def test_last_admin_can_hand_over(client, sql, group):
+    group_id, (owner_id, owner), u1, _ = group
+    response = bulk(client, owner, group_id, add=[{"user_id": u1, "role": "admin"}], remove=[owner_id])
+    assert response.status_code == 200, response.text
+    assert roles(sql, group_id) == {u1: "admin"}
+
+
+def test_only_group_admins(client, make_user, group):
+    group_id, _, u1, _ = group
+    _, outsider = make_user("outsider")
+    assert bulk(client, outsider, group_id, add=[{"user_id": u1, "role": "user"}]).status_code == 403
+
+
+def test_added_members_see_the_group(client, group):
+    group_id, (owner_id, owner), u1, _ = group
+    bulk(client, owner, group_id, add=[{"user_id": u1, "role": "user"}])
+    response = client.get(f"/group/members/{group_id}", headers=owner)
+    assert sorted(member["id"] for member in response.json()) == sorted([owner_id, u1])
+
+
+def test_removed_members_lose_access(client, make_user, group):
+    # Membership is cached per user, the bulk change must invalidate it
+    group_id, (_, owner), _, _ = group
+    member_id, member = make_user("member")
+    bulk(client, owner, group_id, add=[{"user_id": member_id, "role": "user"}])
+    assert client.get(f"/posts/group/{group_id}", headers=member).status_code == 200
+
+    bulk(client, owner, group_id, remove=[member_id])
+    assert client.get(f"/posts/group/{group_id}", headers=member).status_code == 403
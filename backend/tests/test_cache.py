@@ -0,0 +1,139 @@
+import asyncio
+import os
+import fakeredis
+import pytest
+import app.cache
+from app.cache import Cache, MemoryBackend, SQLiteBackend, RedisBackend, pack
+
+
+pytestmark = pytest.mark.anyio
+
+
+def fake_redis_backend():
+    backend = RedisBackend("redis://unused")
+    backend.client, backend.pid = fakeredis.FakeAsyncRedis(), os.getpid()
+    return backend
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+async def backend(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        backend = MemoryBackend(1024 * 1024)
+    elif request.param == "sqlite":
+        backend = SQLiteBackend(str(tmp_path / "cache.db"), 1024 * 1024)
+    else:
+        backend = fake_redis_backend()
+    monkeypatch.setattr(app.cache, "backend", backend)
+    yield backend
+    await backend.close()
+
+@pytest.fixture
+async def redis_backend():
+    backend = fake_redis_backend()
+    yield backend
+    await backend.close()
+
+
+async def test_get_set_delete(backend):
+    assert await backend.get("ns", "a") is None
+    await backend.set("ns", "a", b"1", 60)
+    assert await backend.get("ns", "a") == b"1"
+    await backend.set("ns", "a", b"2", 60)
+    assert await backend.get("ns", "a") == b"2"
+    await backend.delete("ns", "a")
+    assert await backend.get("ns", "a") is None
+
+
+async def test_get_many_keeps_key_order(backend):
+    await backend.set_many("ns", {"a": b"1", "c": b"3"}, 60)
+    assert await backend.get_many("ns", ["c", "b", "a"]) == [b"3", None, b"1"]
+
+
+async def test_namespaces_are_separate(backend):
+    await backend.set("one", "a", b"1", 60)
+    await backend.set("two", "a", b"2", 60)
+    await backend.clear("one")
+    assert await backend.get("one", "a") is None
+    assert await backend.get("two", "a") == b"2"
+
+
+async def test_cache_round_trip(backend):
+    cache = Cache("test_round_trip", 60)
+    assert await cache.get(1) is None
+    await cache.put(1, ("alice", None))
+    assert await cache.get(1) == ("alice", None)
+    await cache.put_many({2: "bob", 3: "carol"})
+    assert await cache.get_many([1, 2, 4]) == {1: ("alice", None), 2: "bob"}
+    await cache.invalidate(1)
+    assert await cache.get(1) is None
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+async def test_expired_entries_are_misses(backend):
+    cache = Cache("test_expiry", 0.05)
+    await cache.put("key", "value")
+    assert await cache.get("key") == "value"
+    await asyncio.sleep(0.1)
+    assert await cache.get("key") is None
+
+
+async def test_clear_namespace(backend):
+    cache = Cache("test_clear", 60)
+    other = Cache("test_clear_other", 60)
+    await cache.put_many({i: i for i in range(50)})
+    await other.put("kept", 1)
+    await cache.clear()
+    assert await cache.get_many(range(50)) == {}
+    assert await other.get("kept") == 1
+
+
+async def test_memory_backend_evicts_least_recently_used():
+    entry = pack("x" * 100, 60)
+    backend = MemoryBackend(len(entry) * 3)
+    for key in "abc":
+        await backend.set("ns", key, entry, 60)
+    await backend.get("ns", "a")
+    await backend.set("ns", "d", entry, 60)
+    assert await backend.get_many("ns", ["a", "b", "c", "d"]) == [entry, None, entry, entry]
+    assert backend.size == len(entry) * 3
+
+
+async def test_sqlite_backend_prunes_expired_entries(tmp_path, monkeypatch):
+    backend = SQLiteBackend(str(tmp_path / "cache.db"), 1024 * 1024)
+    monkeypatch.setattr(backend, "PRUNE_EVERY", 10)
+    await backend.set_many("ns", {f"old{i}": pack(i, -1) for i in range(5)}, -1)
+    await backend.set_many("ns", {f"new{i}": pack(i, 60) for i in range(5)}, 60)
+    assert (await backend.stats())["entries"] == 5
+    await backend.close()
+
+
+async def test_redis_keys_expire_on_their_own(redis_backend):
+    backend = redis_backend
+    await backend.set("ns", "a", b"1", 60)
+    assert 0 < await backend.client.pttl("cache:ns:a") <= 60000
+    await backend.set_many("ns", {"b": b"2"}, 5)
+    assert 0 < await backend.client.pttl("cache:ns:b") <= 5000
+
+
+async def test_redis_clear_in_batches(redis_backend, monkeypatch):
+    backend = redis_backend
+    monkeypatch.setattr(backend, "SCAN_COUNT", 7)
+    await backend.set_many("ns", {str(i): b"x" for i in range(50)}, 60)
+    await backend.set("other", "a", b"x", 60)
+    await backend.clear("ns")
+    assert await backend.client.dbsize() == 1
+
+
+class BrokenBackend(MemoryBackend):
+    async def get(self, namespace, key):
+        raise ConnectionRefusedError()
+
+    async def set(self, namespace, key, raw, ttl):
+        raise ConnectionRefusedError()
+
+
+async def test_unreachable_backend_behaves_like_an_empty_cache(monkeypatch):
+    monkeypatch.setattr(app.cache, "backend", BrokenBackend(1024))
+    cache = Cache("test_broken", 60)
+    await cache.put("key", "value")
+    assert await cache.get("key") is None
+    assert cache.errors == 2
@@ -0,0 +1,125 @@
+import pytest
+import app.api.post
+import app.timeline
+
+
+@pytest.fixture
+def group(make_user, make_group):
+    user_id, headers = make_user("alice")
+    return make_group(headers), user_id, headers
+
+def insert_posts(sql, group_id, user_id, created_at, count):
+    # Straight into the table, so several posts can share a timestamp
+    for i in range(count):
+        sql.execute(
+            "INSERT INTO posts (group_id, user_id, content, created_at) VALUES (?, ?, ?, ?)",
+            (group_id, user_id, f"post {created_at} {i}", created_at)
+        )
+    sql.commit()
+
+def walk(client, url, params, headers, key, page_size):
+    # Every page through the cursors, as a list of pages
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        pages.append(body[key])
+        assert len(body[key]) <= page_size
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+def expected_order(sql, table, where, params):
+    return [row[0] for row in sql.execute(
+        f"SELECT id FROM {table} WHERE {where} ORDER BY created_at DESC, id DESC", params
+    ).fetchall()]
+
+
+def test_feed_pages_cover_every_post_once(client, sql, group):
+    group_id, user_id, headers = group
+    # Ties on created_at are broken by id
+    insert_posts(sql, group_id, user_id, "2026-01-01 12:00:00.000000", 4)
+    insert_posts(sql, group_id, user_id, "2026-01-02 12:00:00.000000", 3)
+    insert_posts(sql, group_id, user_id, "2026-01-03 12:00:00.000000", 4)
+
+    pages = walk(
+        client, f"/posts/group/{group_id}", {"per_page": 3, "include_total": "false"}, headers, "posts", 3
+    )
+    ids = [post["id"] for page in pages for post in page]
+    assert ids == expected_order(sql, "posts", "group_id = ?", (group_id,))
+    assert [len(page) for page in pages] == [3, 3, 3, 2]
+
+
+def test_cursor_is_not_shifted_by_new_posts(client, sql, group):
+    group_id, user_id, headers = group
+    insert_posts(sql, group_id, user_id, "2026-01-01 12:00:00.000000", 6)
+    first = client.get(f"/posts/group/{group_id}", params={"per_page": 3}, headers=headers).json()
+
+    # A new post lands on top between two page loads
+    assert client.post("/posts/", data={"group_id": group_id, "content": "new"}, headers=headers).status_code == 200
+    second = client.get(
+        f"/posts/group/{group_id}", params={"per_page": 3, "cursor": first["next_cursor"]}, headers=headers
+    ).json()
+
+    ids = [post["id"] for post in first["posts"] + second["posts"]]
+    assert ids == expected_order(sql, "posts", "group_id = ? AND content != 'new'", (group_id,))
+    assert second["next_cursor"] is None
+
+
+def test_home_timeline_pages(client, sql, group, monkeypatch):
+    group_id, _, headers = group
+    monkeypatch.setattr(app.api.post, "TIMELINE_FANOUT", True)
+    monkeypatch.setattr(app.timeline, "TIMELINE_FANOUT", True)
+    for i in range(5):
+        response = client.post("/posts/", data={"group_id": group_id, "content": f"post {i}"}, headers=headers)
+        assert response.status_code == 200, response.text
+    assert sql.execute("SELECT count(*) FROM timeline_entries").fetchone()[0] == 5
+
+    pages = walk(client, "/posts/my-groups", {"per_page": 2, "include_total": "false"}, headers, "posts", 2)
+    ids = [post["id"] for page in pages for post in page]
+    assert ids == expected_order(sql, "posts", "group_id = ?", (group_id,))
+
+
+def test_comment_pages(client, sql, group):
+    group_id, user_id, headers = group
+    insert_posts(sql, group_id, user_id, "2026-01-01 12:00:00.000000", 1)
+    post_id = sql.execute("SELECT id FROM posts").fetchone()[0]
+    for created_at in ["2026-01-02 12:00:00.000000"] * 3 + ["2026-01-03 12:00:00.000000"] * 2:
+        sql.execute(
+            "INSERT INTO comments (post_id, user_id, text, created_at) VALUES (?, ?, 'hi', ?)",
+            (post_id, user_id, created_at)
+        )
+    sql.commit()
+
+    pages = walk(client, f"/posts/{post_id}/comments", {"limit": 2}, headers, "comments", 2)
+    ids = [comment["id"] for page in pages for comment in page]
+    assert ids == expected_order(sql, "comments", "post_id = ?", (post_id,))
+
+
+def test_invalid_cursor(client, group):
+    group_id, _, headers = group
+    response = client.get(f"/posts/group/{group_id}", params={"cursor": "not a cursor"}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_post_detail_pages_its_comments(client, sql, group):
+    group_id, user_id, headers = group
+    insert_posts(sql, group_id, user_id, "2026-01-01 12:00:00.000000", 1)
+    post_id = sql.execute("SELECT id FROM posts").fetchone()[0]
+    for i in range(5):
+        sql.execute(
+            "INSERT INTO comments (post_id, user_id, text, created_at) VALUES (?, ?, 'hi', ?)",
+            (post_id, user_id, f"2026-01-02 12:00:0{i}.000000")
+        )
+    sql.commit()
+
+    detail = client.get(f"/posts/{post_id}", params={"limit": 3}, headers=headers).json()
+    assert detail["post"]["id"] == post_id
+    rest = client.get(
+        f"/posts/{post_id}/comments", params={"limit": 3, "cursor": detail["next_cursor"]}, headers=headers
+    ).json()
+    ids = [comment["id"] for comment in detail["comments"] + rest["comments"]]
+    assert ids == expected_order(sql, "comments", "post_id = ?", (post_id,))
+    assert rest["next_cursor"] is None
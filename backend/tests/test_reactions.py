@@ -0,0 +1,129 @@
+import pytest
+
+
+@pytest.fixture
+def post(client, make_user, make_group):
+    # A post by alice in a group bob has joined, (alice, bob, post id)
+    alice = make_user("alice")
+    bob = make_user("bob")
+    group_id = make_group(alice[1])
+    assert client.post(f"/group/join/{group_id}", headers=bob[1]).status_code == 200
+    response = client.post("/posts/", data={"group_id": group_id, "content": "hello"}, headers=alice[1])
+    assert response.status_code == 200, response.text
+    return alice, bob, response.json()["post_id"]
+
+def comment_on(client, headers, post_id, text="a comment"):
+    response = client.post(f"/posts/{post_id}/comment", data={"text": text}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+def react(client, headers, target, reaction_type):
+    response = client.post(f"/posts/{target}/reaction?reaction_type={reaction_type}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def counts(sql, table, row_id):
+    row = sql.execute(f"SELECT like_count, dislike_count FROM {table} WHERE id = ?", (row_id,)).fetchone()
+    return row["like_count"], row["dislike_count"]
+
+
+def test_toggle_adds_switches_and_removes(client, sql, post):
+    _, (_, bob), post_id = post
+
+    result = react(client, bob, post_id, "like")
+    assert (result["my_reaction"], result["like_count"], result["dislike_count"]) == ("like", 1, 0)
+
+    # The other reaction replaces it
+    result = react(client, bob, post_id, "dislike")
+    assert (result["my_reaction"], result["like_count"], result["dislike_count"]) == ("dislike", 0, 1)
+
+    # The same one again takes it back
+    result = react(client, bob, post_id, "dislike")
+    assert (result["my_reaction"], result["like_count"], result["dislike_count"]) == (None, 0, 0)
+
+    assert counts(sql, "posts", post_id) == (0, 0)
+    assert sql.execute("SELECT count(*) FROM reactions").fetchone()[0] == 0
+
+
+def test_counters_add_up_across_users(client, sql, post):
+    (_, alice), (_, bob), post_id = post
+    react(client, alice, post_id, "like")
+    result = react(client, bob, post_id, "like")
+    assert (result["like_count"], result["dislike_count"]) == (2, 0)
+    result = react(client, alice, post_id, "dislike")
+    assert (result["like_count"], result["dislike_count"]) == (1, 1)
+    assert counts(sql, "posts", post_id) == (1, 1)
+
+
+def test_unknown_reaction_type(client, post):
+    _, (_, bob), post_id = post
+    assert client.post(f"/posts/{post_id}/reaction?reaction_type=love", headers=bob).status_code == 400
+
+
+def test_reacting_needs_membership(client, make_user, post):
+    *_, post_id = post
+    _, carol = make_user("carol")
+    assert client.post(f"/posts/{post_id}/reaction?reaction_type=like", headers=carol).status_code == 403
+
+
+def test_deleting_a_reaction_decrements_its_counter(client, sql, post):
+    _, (bob_id, bob), post_id = post
+    react(client, bob, post_id, "like")
+    reaction_id = sql.execute("SELECT id FROM reactions WHERE user_id = ?", (bob_id,)).fetchone()[0]
+
+    assert client.delete(f"/posts/reaction/{reaction_id}", headers=bob).status_code == 200
+    assert counts(sql, "posts", post_id) == (0, 0)
+
+
+def test_comment_reactions_toggle(client, sql, post):
+    (_, alice), (_, bob), post_id = post
+    comment_on(client, alice, post_id)
+    comment_id = sql.execute("SELECT id FROM comments").fetchone()[0]
+
+    result = react(client, bob, f"comments/{comment_id}", "like")
+    assert (result["my_reaction"], result["like_count"], result["dislike_count"]) == ("like", 1, 0)
+    result = react(client, bob, f"comments/{comment_id}", "like")
+    assert (result["my_reaction"], result["like_count"], result["dislike_count"]) == (None, 0, 0)
+    # Comment reactions don't count towards the post
+    react(client, bob, f"comments/{comment_id}", "dislike")
+    assert counts(sql, "comments", comment_id) == (0, 1)
+    assert counts(sql, "posts", post_id) == (0, 0)
+
+
+def test_comment_count_follows_comments(client, sql, post):
+    (_, alice), (_, bob), post_id = post
+    comment_on(client, alice, post_id)
+    comment_on(client, bob, post_id)
+    assert sql.execute("SELECT comment_count FROM posts WHERE id = ?", (post_id,)).fetchone()[0] == 2
+
+    comment_id = sql.execute("SELECT id FROM comments WHERE text = 'a comment' ORDER BY id LIMIT 1").fetchone()[0]
+    assert client.delete(f"/posts/comment/{comment_id}", headers=alice).status_code == 200
+    assert sql.execute("SELECT comment_count FROM posts WHERE id = ?", (post_id,)).fetchone()[0] == 1
+
+
+def test_deleted_comment_takes_its_reactions(client, sql, post):
+    (_, alice), (_, bob), post_id = post
+    comment_on(client, alice, post_id)
+    comment_id = sql.execute("SELECT max(id) FROM comments").fetchone()[0]
+    react(client, bob, f"comments/{comment_id}", "like")
+    assert client.delete(f"/posts/comment/{comment_id}", headers=alice).status_code == 200
+    assert sql.execute("SELECT count(*) FROM reactions").fetchone()[0] == 0
+
+    # A new comment reusing the rowid starts from zero, and bob's reaction
+    # is a new one rather than the removal of a leftover
+    comment_on(client, alice, post_id, "another")
+    assert sql.execute("SELECT max(id) FROM comments").fetchone()[0] == comment_id
+    result = react(client, bob, f"comments/{comment_id}", "like")
+    assert (result["my_reaction"], result["like_count"]) == ("like", 1)
+
+
+def test_deleted_post_takes_comments_and_reactions(client, sql, post):
+    (_, alice), (_, bob), post_id = post
+    comment_on(client, bob, post_id)
+    comment_id = sql.execute("SELECT max(id) FROM comments").fetchone()[0]
+    react(client, bob, post_id, "like")
+    react(client, alice, f"comments/{comment_id}", "like")
+
+    assert client.delete(f"/posts/post/{post_id}", headers=alice).status_code == 200
+    assert sql.execute("SELECT count(*) FROM comments").fetchone()[0] == 0
+    assert sql.execute("SELECT count(*) FROM reactions").fetchone()[0] == 0
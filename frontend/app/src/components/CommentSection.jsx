@@ -3,6 +3,7 @@ import { useState, useEffect, useMemo } from "react";
 const CommentSection = ({ postId, onCommentAdded }) => {
   const [newComment, setNewComment] = useState("");
   const [comments, setComments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
   const token = localStorage.getItem("access_token");
   
@@ -14,12 +15,15 @@ const CommentSection = ({ postId, onCommentAdded }) => {
   const getAvatarUrl = (avatar) => {
     if (!avatar) return "/default-avatar.jpg";
     if (avatar.startsWith("data:image")) return avatar;
+    if (avatar.startsWith("http")) return avatar;
     return `data:image/png;base64,${avatar}`;
   };
 
-  const fetchComments = async () => {
+  // Comments come newest first, a page at a time; older ones are prepended
+  const fetchComments = async (cursor = null) => {
     try {
-      const response = await fetch(`http://localhost:8000/posts/${postId}`, {
+      const cursorParam = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const response = await fetch(`http://localhost:8000/posts/${postId}/comments${cursorParam}`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -30,7 +34,9 @@ const CommentSection = ({ postId, onCommentAdded }) => {
       }
 
       const data = await response.json();
-      setComments(data.comments || []);
+      const page = [...(data.comments || [])].reverse();
+      setComments(prevComments => (cursor ? [...page, ...prevComments] : page));
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error('Error fetching comments:', error);
     } finally {
@@ -84,6 +90,11 @@ const CommentSection = ({ postId, onCommentAdded }) => {
     <div className="comments-section" onClick={(e) => e.stopPropagation()}>
       <h4>Comments</h4>
       <div className="comments-list">
+        {nextCursor && (
+          <button onClick={() => fetchComments(nextCursor)} className="load-more-comments">
+            Load older comments
+          </button>
+        )}
         {isLoading ? (
           <p>Loading comments...</p>
         ) : comments.length === 0 ? (
@@ -14,7 +14,7 @@ export const Dashboard = () => {
   const token = useMemo(() => localStorage.getItem("access_token"), []);
   const [groups, setGroups] = useState([]);
   const [posts, setPosts] = useState([]);
-  const [currentPage, setCurrentPage] = useState(1);
+  const [nextCursor, setNextCursor] = useState(null);
   const [hasMore, setHasMore] = useState(true);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -53,31 +53,27 @@ export const Dashboard = () => {
     }
   }, [token, navigate]);
 
-  // 2) Fetch a single page of posts
+  // 2) Fetch a single page of posts (no cursor = first page)
   const fetchPosts = useCallback(
-    async (page = 1) => {
+    async (cursor = null) => {
       if (!token) return;
       try {
+        const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
         const res = await fetch(
-          `${API_URL}/posts/my-groups?page=${page}&per_page=${POSTS_PER_PAGE}`,
+          `${API_URL}/posts/my-groups?per_page=${POSTS_PER_PAGE}&include_total=false${cursorParam}`,
           { headers: { Authorization: `Bearer ${token}` } }
         );
         if (!res.ok) throw new Error("Failed to fetch posts");
-        const { posts: fetchedPosts, total_pages } = await res.json();
-
-        // Ensure each post has a reactions array
-        const processedPosts = fetchedPosts.map(post => ({
-          ...post,
-          reactions: post.reactions || []
-        }));
+        const { posts: fetchedPosts, next_cursor } = await res.json();
 
         setPosts((prev) => {
-          if (page === 1) return processedPosts;
+          if (!cursor) return fetchedPosts;
           const existingIds = new Set(prev.map((p) => p.id));
-          const newOnes = processedPosts.filter((p) => !existingIds.has(p.id));
+          const newOnes = fetchedPosts.filter((p) => !existingIds.has(p.id));
           return [...prev, ...newOnes];
         });
-        setHasMore(page < total_pages);
+        setNextCursor(next_cursor);
+        setHasMore(!!next_cursor);
       } catch (err) {
         console.error("Error fetching posts:", err);
         setError("Could not load posts.");
@@ -99,7 +95,7 @@ export const Dashboard = () => {
           fetch(`${API_URL}/group/mygroups`, {
             headers: { Authorization: `Bearer ${token}` },
           }),
-          fetch(`${API_URL}/posts/my-groups?page=1&per_page=${POSTS_PER_PAGE}`, {
+          fetch(`${API_URL}/posts/my-groups?per_page=${POSTS_PER_PAGE}&include_total=false`, {
             headers: { Authorization: `Bearer ${token}` },
           })
         ]);
@@ -108,17 +104,13 @@ export const Dashboard = () => {
         if (!postsRes.ok) throw new Error("Failed to fetch posts");
 
         const groupsData = await groupsRes.json();
-        const { posts: fetchedPosts, total_pages } = await postsRes.json();
+        const { posts: fetchedPosts, next_cursor } = await postsRes.json();
 
         if (isMounted) {
           setGroups(groupsData);
-          // Ensure each post has a reactions array
-          const processedPosts = fetchedPosts.map(post => ({
-            ...post,
-            reactions: post.reactions || []
-          }));
-          setPosts(processedPosts);
-          setHasMore(1 < total_pages);
+          setPosts(fetchedPosts);
+          setNextCursor(next_cursor);
+          setHasMore(!!next_cursor);
           setIsLoading(false);
         }
       } catch (err) {
@@ -140,11 +132,9 @@ export const Dashboard = () => {
   useEffect(() => {
     const observer = new IntersectionObserver(
       (entries) => {
-        if (entries[0].isIntersecting && hasMore && !isLoading) {
-          const nextPage = currentPage + 1;
+        if (entries[0].isIntersecting && hasMore && nextCursor && !isLoading) {
           setIsLoading(true);
-          fetchPosts(nextPage).then(() => {
-            setCurrentPage(nextPage);
+          fetchPosts(nextCursor).then(() => {
             setIsLoading(false);
           });
         }
@@ -161,7 +151,7 @@ export const Dashboard = () => {
         observer.unobserve(observerTarget.current);
       }
     };
-  }, [currentPage, hasMore, isLoading, fetchPosts]);
+  }, [nextCursor, hasMore, isLoading, fetchPosts]);
 
   // 5) Handlers for create/join/leave group
   const handleGroupCreated = useCallback(
@@ -169,8 +159,7 @@ export const Dashboard = () => {
       setGroups((prev) => [...prev, newGroup]);
       // We do not re-fetch all groups—just append the new one locally.
       // Then reload only page 1 of posts to include any new‐group posts:
-      setCurrentPage(1);
-      fetchPosts(1);
+      fetchPosts();
     },
     [fetchPosts]
   );
@@ -181,8 +170,7 @@ export const Dashboard = () => {
         setGroups((prev) => [...prev, newGroup]);
       }
       // Reload page 1 of posts so you see posts from this newly joined group:
-      setCurrentPage(1);
-      fetchPosts(1);
+      fetchPosts();
     },
     [groups, fetchPosts]
   );
@@ -191,8 +179,7 @@ export const Dashboard = () => {
     (leftGroup) => {
       setGroups((prev) => prev.filter((g) => g.id !== leftGroup.id));
       // Reload page 1, since you no longer see that group's posts:
-      setCurrentPage(1);
-      fetchPosts(1);
+      fetchPosts();
     },
     [fetchPosts]
   );
@@ -216,35 +203,18 @@ export const Dashboard = () => {
         );
         if (!res.ok) throw new Error("Failed to add reaction");
 
-        // Find the post's group_id first
-        const post = posts.find((p) => p.id === postId);
-        if (!post) return;
-
-        // Fetch updated post data
-        const updatedPostRes = await fetch(
-          `${API_URL}/posts/group/${post.group_id}?post_id=${postId}`,
-          { headers: { Authorization: `Bearer ${token}` } }
-        );
-        if (!updatedPostRes.ok) throw new Error("Failed to fetch updated post");
-        
-        // Find the specific post in the response array
-        const { posts: fetchedPosts } = await updatedPostRes.json();
-        const updatedPost = fetchedPosts.find(p => p.id === postId);
-        
-        if (!updatedPost) {
-          console.error("Updated post not found in response");
-          return;
-        }
-
-        // Update the posts state with the new post data
+        // The response carries the new counts and our reaction
+        const { my_reaction, like_count, dislike_count } = await res.json();
         setPosts((prev) =>
-          prev.map((p) => (p.id === postId ? updatedPost : p))
+          prev.map((p) =>
+            p.id === postId ? { ...p, my_reaction, like_count, dislike_count } : p
+          )
         );
       } catch (err) {
         console.error("Error adding reaction:", err);
       }
     },
-    [token, posts]
+    [token]
   );
 
   // 7) Delete post: DELETE then remove it from state
@@ -556,8 +526,7 @@ export const Dashboard = () => {
           onClose={() => {
             setIsPostPopupOpen(false);
             // Reload only page 1 after creating a post:
-            setCurrentPage(1);
-            fetchPosts(1);
+            fetchPosts();
           }}
         />
       )}
@@ -338,13 +338,19 @@ const GroupPage = () => {
           }
         );
         if (!res.ok) throw new Error("Failed to add reaction");
-        
-        await updatePostInState(postId);
+
+        // The response carries the new counts and our reaction
+        const { my_reaction, like_count, dislike_count } = await res.json();
+        setPosts((prev) =>
+          prev.map((p) =>
+            p.id === postId ? { ...p, my_reaction, like_count, dislike_count } : p
+          )
+        );
       } catch (err) {
         console.error("Error adding reaction:", err);
       }
     },
-    [token, updatePostInState]
+    [token]
   );
 
   const toggleComments = (postId) => {
@@ -583,15 +589,11 @@ const GroupPage = () => {
 
   const renderPost = useMemo(
     () => (post) => {
-      const hasLiked = post.reactions?.some(
-        (r) => r.user_id === currentUserId && r.type === "like"
-      );
-      const hasDisliked = post.reactions?.some(
-        (r) => r.user_id === currentUserId && r.type === "dislike"
-      );
-      const likeCount = post.reactions?.filter((r) => r.type === "like").length || 0;
-      const dislikeCount = post.reactions?.filter((r) => r.type === "dislike").length || 0;
-      const commentCount = post.comments?.length || 0;
+      const hasLiked = post.my_reaction === "like";
+      const hasDisliked = post.my_reaction === "dislike";
+      const likeCount = post.like_count || 0;
+      const dislikeCount = post.dislike_count || 0;
+      const commentCount = post.comment_count ?? post.comments?.length ?? 0;
 
       const isAdmin = userRole === "admin";
       const isPostOwner = post.user_id === currentUserId;
@@ -670,6 +672,7 @@ const GroupPage = () => {
             <CommentSection
               postId={post.id}
               comments={post.comments || []}
+              commentCount={commentCount}
               currentUserId={currentUserId}
               userRole={userRole}
               onComment={handleComment}
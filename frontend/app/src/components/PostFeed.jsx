@@ -108,11 +108,11 @@ const PostFeed = ({
   const renderPost = (post, index) => {
     if (!post) return null;
 
-    const hasLiked = post.reactions?.some(r => r.user_id === currentUserId && r.type === 'like');
-    const hasDisliked = post.reactions?.some(r => r.user_id === currentUserId && r.type === 'dislike');
-    const likeCount = post.reactions?.filter(r => r.type === 'like').length || 0;
-    const dislikeCount = post.reactions?.filter(r => r.type === 'dislike').length || 0;
-    const commentCount = post.comments?.length || 0;
+    const hasLiked = post.my_reaction === 'like';
+    const hasDisliked = post.my_reaction === 'dislike';
+    const likeCount = post.like_count || 0;
+    const dislikeCount = post.dislike_count || 0;
+    const commentCount = post.comment_count ?? post.comments?.length ?? 0;
     const group = groups?.find(g => g.id === post.group_id);
 
     // Add ref to the last post element
@@ -191,6 +191,7 @@ const PostFeed = ({
           <CommentSection 
             postId={post.id}
             comments={post.comments || []}
+            commentCount={commentCount}
             currentUserId={currentUserId}
             userRole={userRole}
             onComment={onCommentAdded}
@@ -29,6 +29,10 @@ export const Profile = () => {
   const [allPosts, setAllPosts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState("posts");
+  const [myComments, setMyComments] = useState([]);
+  const [commentPosts, setCommentPosts] = useState({});
+  const [commentsCursor, setCommentsCursor] = useState(null);
+  const [commentsLoaded, setCommentsLoaded] = useState(false);
 
   // Unified post update function
   const updatePostInState = useCallback(async (postId) => {
@@ -62,22 +66,10 @@ export const Profile = () => {
     switch (activeTab) {
       case "posts":
         return allPosts.filter(p => p.user_id === currentUserId);
-      case "comments":
-        return allPosts.filter(p => 
-          p.comments?.some(c => c.user_id === currentUserId)
-        );
       case "likes":
-        return allPosts.filter(p => 
-          p.reactions?.some(r => 
-            r.user_id === currentUserId && r.type === "like"
-          )
-        );
+        return allPosts.filter(p => p.my_reaction === "like");
       case "dislikes":
-        return allPosts.filter(p => 
-          p.reactions?.some(r => 
-            r.user_id === currentUserId && r.type === "dislike"
-          )
-        );
+        return allPosts.filter(p => p.my_reaction === "dislike");
       default:
         return allPosts;
     }
@@ -151,7 +143,6 @@ export const Profile = () => {
         const { posts } = await postsRes.json();
         const withDetails = posts.map(p => ({
           ...p,
-          reactions: Array.isArray(p.reactions) ? p.reactions : [],
           comments: Array.isArray(p.comments) ? p.comments : [],
           user: p.user || { username: "Unknown", avatar: null }
         }));
@@ -188,6 +179,36 @@ export const Profile = () => {
     loadAll();
   }, [token, navigate, currentUserId, fetchUserContent]);
 
+  // The user's own comments come from their own endpoint, newest first a
+  // page at a time: feed posts only carry the latest few comments
+  const fetchMyComments = useCallback(async (cursor = null) => {
+    try {
+      const cursorParam = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await fetch(`${API_URL}/posts/my/comments${cursorParam}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (!res.ok) throw new Error("Failed to fetch comments");
+
+      const data = await res.json();
+      setMyComments(prev => (cursor ? [...prev, ...data.comments] : data.comments));
+      setCommentPosts(prev => ({
+        ...(cursor ? prev : {}),
+        ...Object.fromEntries(data.posts.map(post => [post.id, post]))
+      }));
+      setCommentsCursor(data.next_cursor);
+    } catch (err) {
+      console.error("Error fetching comments:", err);
+    } finally {
+      setCommentsLoaded(true);
+    }
+  }, [token]);
+
+  useEffect(() => {
+    if (activeTab === "comments" && token) {
+      fetchMyComments();
+    }
+  }, [activeTab, token, fetchMyComments]);
+
   useEffect(() => {
     const handleAvatarChange = (event) => {
       setAvatar(event.detail.avatar);
@@ -310,6 +331,29 @@ export const Profile = () => {
     [token, allPosts, currentUserId, updatePostInState]
   );
 
+  const handleDeleteMyComment = useCallback(
+    async (commentId) => {
+      if (!window.confirm("Are you sure you want to delete this comment?")) return;
+
+      try {
+        const res = await fetch(`${API_URL}/posts/comment/${commentId}`, {
+          method: "DELETE",
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!res.ok) {
+          const errorData = await res.json();
+          throw new Error(errorData.detail || "Failed to delete comment");
+        }
+
+        setMyComments(prev => prev.filter(c => c.id !== commentId));
+      } catch (err) {
+        console.error("Error deleting comment:", err);
+        alert(err.message || "Failed to delete comment. Please try again.");
+      }
+    },
+    [token]
+  );
+
   const handleCommentReaction = useCallback(
     async (commentId, type) => {
       try {
@@ -430,18 +474,64 @@ export const Profile = () => {
             </div>
 
             <div className="profile-content">
-              <PostFeed
-                posts={filteredPosts}
-                groups={groups}
-                onLike={handleReaction}
-                onDislike={handleReaction}
-                onDelete={handleDeletePost}
-                userRole="user"
-                onCommentAdded={handleComment}
-                onCommentReaction={handleCommentReaction}
-                onDeleteComment={handleDeleteComment}
-                currentUserId={currentUserId}
-              />
+              {activeTab === "comments" ? (
+                <div className="my-comments">
+                  {commentsLoaded && myComments.length === 0 && (
+                    <div className="no-posts">You haven't commented on anything yet.</div>
+                  )}
+                  {myComments.map((comment) => {
+                    const post = commentPosts[comment.post_id];
+                    const group = post && groups.find(g => g.id === post.group_id);
+                    return (
+                      <div key={comment.id} className="comment">
+                        <div className="comment-header">
+                          <span className="comment-time">{new Date(comment.created_at).toLocaleString()}</span>
+                          <button
+                            className="delete-comment-btn"
+                            onClick={() => handleDeleteMyComment(comment.id)}
+                            title="Delete comment"
+                          >
+                            ×
+                          </button>
+                        </div>
+                        <p className="comment-text">{comment.text}</p>
+                        <div className="my-comment-meta">
+                          👍 {comment.like_count} · 👎 {comment.dislike_count}
+                          {post && (
+                            <span
+                              className="my-comment-post"
+                              onClick={() => group && handleGroupClick(group)}
+                              title={group ? `View ${group.name}` : undefined}
+                            >
+                              {" "}on {post.user?.username || "Unknown User"}'s post
+                              {group ? ` in ${group.name}` : ""}: “{post.content.slice(0, 80)}
+                              {post.content.length > 80 ? "…" : ""}”
+                            </span>
+                          )}
+                        </div>
+                      </div>
+                    );
+                  })}
+                  {commentsCursor && (
+                    <button onClick={() => fetchMyComments(commentsCursor)} className="load-more-my-comments">
+                      Load more comments
+                    </button>
+                  )}
+                </div>
+              ) : (
+                <PostFeed
+                  posts={filteredPosts}
+                  groups={groups}
+                  onLike={handleReaction}
+                  onDislike={handleReaction}
+                  onDelete={handleDeletePost}
+                  userRole="user"
+                  onCommentAdded={handleComment}
+                  onCommentReaction={handleCommentReaction}
+                  onDeleteComment={handleDeleteComment}
+                  currentUserId={currentUserId}
+                />
+              )}
             </div>
           </div>
         </div>
@@ -2,9 +2,12 @@ import { useState } from 'react';
 import { FaTrash } from 'react-icons/fa';
 import './comment-section.css';
 
+const API_URL = "http://localhost:8000";
+
 const CommentSection = ({ 
   postId, 
   comments = [], 
+  commentCount = 0,
   currentUserId, 
   userRole,
   onComment,
@@ -13,6 +16,30 @@ const CommentSection = ({
   isLoggedIn 
 }) => {
   const [newComment, setNewComment] = useState('');
+  const [olderComments, setOlderComments] = useState([]);
+  const [olderCursor, setOlderCursor] = useState(null);
+
+  // The feed only embeds the latest few comments, older ones are paged in
+  const previewIds = new Set(comments.map(c => c.id));
+  const older = olderComments.filter(c => !previewIds.has(c.id));
+  const hasOlder = olderCursor !== null || commentCount > comments.length + older.length;
+
+  const loadOlderComments = async () => {
+    try {
+      const token = localStorage.getItem('access_token');
+      const cursorParam = olderCursor ? `?cursor=${encodeURIComponent(olderCursor)}` : '';
+      const res = await fetch(`${API_URL}/posts/${postId}/comments${cursorParam}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      if (!res.ok) throw new Error('Failed to fetch comments');
+      const data = await res.json();
+      const page = [...data.comments].reverse();
+      setOlderComments(prev => [...page, ...prev.filter(c => !page.some(p => p.id === c.id))]);
+      setOlderCursor(data.next_cursor);
+    } catch (err) {
+      console.error('Error loading comments:', err);
+    }
+  };
 
   const handleComment = async () => {
     const text = newComment.trim();
@@ -60,15 +87,16 @@ const CommentSection = ({
   return (
     <div className="comments-section">
       <div className="comments-list">
-        {comments.map((comment) => {
-          const hasLikedComment = comment.reactions?.some(
-            r => r.user_id === currentUserId && r.type === 'like'
-          );
-          const hasDislikedComment = comment.reactions?.some(
-            r => r.user_id === currentUserId && r.type === 'dislike'
-          );
-          const commentLikeCount = comment.reactions?.filter(r => r.type === 'like').length || 0;
-          const commentDislikeCount = comment.reactions?.filter(r => r.type === 'dislike').length || 0;
+        {hasOlder && (
+          <button onClick={loadOlderComments} className="load-more-comments">
+            View older comments
+          </button>
+        )}
+        {[...older, ...comments].map((comment) => {
+          const hasLikedComment = comment.my_reaction === 'like';
+          const hasDislikedComment = comment.my_reaction === 'dislike';
+          const commentLikeCount = comment.like_count || 0;
+          const commentDislikeCount = comment.dislike_count || 0;
 
           return (
             <div key={comment.id} className="comment">